@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark
+End to end throughput of the converters and the Rectifier.
+
+For each size, writes a synthetic corpus of that many rows with Corpus, then runs Tabbed, Pipe Converter and the
+Rectifier over it, each in its own process and with a throwaway home folder, so that the Desktop folders they work in
+are the corpus. Reports how many rows went through per second, the peak memory of the process, and whether the output
+matches the rows the corpus says it should come out as.
+
+    python Benchmark.py [--sizes 10000 100000 1000000] [--programs Tabbed Pipe Rectifier] [--json FILE] [...]
+
+Anything else on the command line is passed along to the converters, like --stream or --workers.
+
+Peak memory is only measured where the operating system reports it for a single child process (not on Windows).
+"""
+
+import os
+import sys
+import time
+import json
+import shutil
+import tempfile
+import argparse
+import subprocess
+import csv
+
+import Corpus
+
+repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+programs = {'Tabbed': os.path.join(repo, "Converters", "Tabbed.py"),
+            'Pipe': os.path.join(repo, "Converters", "Pipe Converter.py"),
+            'Rectifier': os.path.join(repo, "Rectifier", "Rectifier.py")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the converters and the Rectifier on a synthetic corpus.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help="rows in each corpus")
+    parser.add_argument('--programs', nargs='+', choices=sorted(programs), default=['Tabbed', 'Pipe', 'Rectifier'],
+                        help="programs to run")
+    parser.add_argument('--json', help="also write the results to this file")
+    parser.add_argument('--keep', action='store_true', help="keep the corpus and the output of each run")
+    args, extra = parser.parse_known_args()
+
+    results = []
+    print("%-10s %9s %9s %11s %9s  %s" % ("program", "rows", "seconds", "rows/s", "peak MB", "parity"))
+    for size in args.sizes:
+        folder = tempfile.mkdtemp(prefix="corpus-")
+        manifest = Corpus.generate(os.path.join(folder, "Corpus"), size)
+        for name in args.programs:
+            result = run(name, folder, manifest, extra)
+            result['size'] = size
+            results.append(result)
+            peak = "-" if result['peak'] is None else "%.1f" % (result['peak'] / 1024 / 1024)
+            print("%-10s %9d %9.2f %11.0f %9s  %s" % (name, result['rows'], result['seconds'],
+                                                     result['rows'] / result['seconds'], peak, result['parity']))
+        if args.keep:
+            print("Kept %s" % folder)
+        else:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+# Runs one program over a fresh copy of the corpus and checks what it made of it.
+def run(name, folder, manifest, extra):
+    home = os.path.join(folder, name)
+    desktop = os.path.join(home, "Desktop")
+    if os.path.isdir(home):
+        shutil.rmtree(home)
+    os.makedirs(desktop)
+    corpus = os.path.join(folder, "Corpus")
+    if name == 'Rectifier':
+        shutil.copytree(os.path.join(corpus, "Problem"), os.path.join(desktop, "Problem"))
+        command = [sys.executable, programs[name]]
+    else:
+        shutil.copytree(os.path.join(corpus, "Source"), os.path.join(desktop, "Source"))
+        command = [sys.executable, programs[name]] + extra
+
+    env = dict(os.environ, HOME=home, USERPROFILE=home)
+    seconds, peak, status = measure(command, env)
+
+    if status:
+        rows = 0
+        parity = "exited with status %d" % status
+    elif name == 'Rectifier':
+        rows = sum(1 for line in open(os.path.join(corpus, "Expected", "report.txt")))
+        parity = check_rectifier(desktop, os.path.join(corpus, "Expected", "report.txt"))
+    else:
+        rows = sum(manifest[stem]['rows'] for stem in manifest if manifest[stem]['expected'])
+        parity = check_converter(desktop, manifest, '|' if name == 'Pipe' else '\t', name == 'Pipe')
+    return {'program': name, 'rows': rows, 'seconds': seconds, 'peak': peak, 'parity': parity}
+
+
+# Runs a command to the end. Returns how long it took, the peak resident memory of the process in bytes, if the
+# operating system says, and its exit status.
+def measure(command, env):
+    start = time.perf_counter()
+    child = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    peak = None
+    if hasattr(os, 'wait4'):
+        pid, status, usage = os.wait4(child.pid, 0)
+        status = os.WEXITSTATUS(status) if os.WIFEXITED(status) else 1
+        # Linux counts in kilobytes, and macOS in bytes.
+        peak = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    else:
+        status = child.wait()
+    return time.perf_counter() - start, peak, status
+
+
+# Compares each converted file against the rows it should have come out as, part by part, with the header dropped
+# from the top of each part when the converter writes one. Files that aren't meant to be readable should be in Problem.
+def check_converter(desktop, manifest, delimiter, headed):
+    target = os.path.join(desktop, "Target")
+    outputs = os.listdir(target) if os.path.isdir(target) else []
+    problems = []
+    for stem in sorted(manifest):
+        if not manifest[stem]['expected']:
+            problem = os.path.join(desktop, "Problem")
+            moved = os.listdir(problem) if os.path.isdir(problem) else []
+            if not any(os.path.splitext(name)[0] == stem for name in moved):
+                problems.append("%s was converted" % stem)
+            continue
+
+        parts = sorted((part_number(name), name) for name in outputs if name.startswith(stem + " ("))
+        if not parts:
+            problems.append("%s missing" % stem)
+            continue
+        produced = read_parts([os.path.join(target, name) for number, name in parts], delimiter, headed)
+        difference = compare(produced, manifest[stem]['expected'])
+        if difference:
+            problems.append("%s %s" % (stem, difference))
+    return "; ".join(problems) or "match"
+
+
+# The Rectifier writes the report back out tab delimited, with its own header on top.
+def check_rectifier(desktop, expected):
+    source = os.path.join(desktop, "Source")
+    outputs = os.listdir(source) if os.path.isdir(source) else []
+    if not outputs:
+        return "report missing"
+    difference = compare(read_parts([os.path.join(source, outputs[0])], '\t', True), expected)
+    return "report %s" % difference if difference else "match"
+
+
+def part_number(name):
+    number = name[name.rindex(')') + 1:].split('.')[0]
+    return int(number) if number else 0
+
+
+def read_parts(paths, delimiter, headed):
+    for path in paths:
+        with open(path, newline='') as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            if headed:
+                next(reader, None)
+            for row in reader:
+                yield row
+
+
+# Returns where two sets of rows first differ, or None if they don't.
+def compare(produced, expected):
+    with open(expected, newline='') as f:
+        wanted = csv.reader(f, delimiter='\t')
+        line = 0
+        for row in produced:
+            line += 1
+            want = next(wanted, None)
+            if want is None:
+                return "has extra rows from row %d" % line
+            if row != want:
+                return "differs at row %d: %s" % (line, first_difference(row, want))
+        if next(wanted, None) is not None:
+            return "is short, ends after row %d" % line
+    return None
+
+
+def first_difference(row, want):
+    for i in range(min(len(row), len(want))):
+        if row[i] != want[i]:
+            return "%r instead of %r" % (row[i], want[i])
+    return "%d cells instead of %d" % (len(row), len(want))
+
+
+# Runs the main, after establishing that this is not a library.
+if __name__ == "__main__":
+    main()
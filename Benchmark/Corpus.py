@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+"""
+Corpus
+Synthetic source files for the benchmark.
+
+Writes a corpus of made up vendor files the way they tend to come in: tab and comma delimited text, a pipe delimited
+export, .xls workbooks with a hidden ghost sheet in front, and a multi-spaced report for the Rectifier. The headers
+are taken from the aliases the converters know, in a different order in each file, and the dates come in a different
+format in each column. Next to every file, the rows the converters should turn it into are written out, so that the
+output of a run can be checked against them.
+
+Run on its own, it writes a corpus into a folder:
+    python Corpus.py <folder> <rows>
+
+Requires xlwt for the .xls workbooks. Without it, they are left out.
+"""
+
+import os
+import sys
+import datetime
+import random
+import csv
+
+try:
+    import xlwt
+except ImportError:
+    xlwt = None
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python Corpus.py <folder> <rows>")
+        return
+    manifest = generate(sys.argv[1], int(sys.argv[2]))
+    for name in sorted(manifest):
+        print("%s: %d rows" % (name, manifest[name]['rows']))
+
+
+# The target header, in the order the converters write it out.
+target = ['Supplier Name', 'Supplier Number', 'Reference', 'Amount', 'Currency', 'Invoice Date', 'Payment Date',
+          'Entered Date']
+
+# Headers the vendors send, each one an alias the converters know for the target column in the same position.
+header_variants = [['Vendor Name', 'Vendor Id', 'Invoice Id', 'Gross Amount', 'Curr', 'Invoice Date', 'Check date',
+                    'Post Date'],
+                   ['Vname', 'Vendor Number', 'AP Invoice Number', 'Invoice Amount', 'Currency', 'Invoice Dt',
+                    'Payment Date', 'Create Date'],
+                   ['Name1', 'Vendor #', 'Reference Number', 'Amt', 'Inv Currency', 'Document Date', 'Clear Date',
+                    'Entered Date'],
+                   ['Vendor Vname', 'Duns_no', 'Doc_Number', 'cost_amt', 'InvCurrency', 'doc_date', 'pay_due_date',
+                    'entry_date']]
+
+# The ways the dates are written in the source files, with the strftime format for each.
+date_styles = {'slashed': "%m/%d/%Y", 'compact': "%Y%m%d", 'dashed': "%m-%d-%Y", 'named': "%d-%b-%y",
+               'iso': "%Y/%m/%d"}
+
+# How much of the corpus goes into each kind of file.
+shares = {'tabbed': 0.3, 'comma': 0.25, 'pipe': 0.05, 'book': 0.2, 'narrow': 0.2}
+
+
+# Writes a corpus of about so many rows into a folder. The source files go in Source, the report for the Rectifier in
+# Problem, and the rows each file should come out as in Expected, one tab delimited file for each. Returns a manifest
+# of the files, with how many rows are in each, and where the expected rows are. Files the converters aren't meant to
+# be able to read have no expected rows.
+def generate(folder, rows, seed=1):
+    rng = random.Random(seed)
+    for sub in ("Source", "Problem", "Expected"):
+        if not os.path.isdir(os.path.join(folder, sub)):
+            os.makedirs(os.path.join(folder, sub))
+
+    manifest = {}
+    count = max(1, int(rows * shares['tabbed']))
+    write_text(folder, "tabbed", ".txt", '\t', count, header_variants[0], ['slashed', 'compact', 'dashed'], rng)
+    manifest['tabbed'] = {'rows': count, 'expected': True}
+
+    count = max(1, int(rows * shares['comma']))
+    write_text(folder, "comma", ".csv", ',', count, header_variants[1], ['named', 'iso', 'compact'], rng, quote=True)
+    manifest['comma'] = {'rows': count, 'expected': True}
+
+    count = max(1, int(rows * shares['narrow']))
+    write_text(folder, "narrow", ".txt", '\t', count, header_variants[3], ['dashed', 'slashed', 'iso'], rng,
+               drop=['Entered Date'], extra="Memo")
+    manifest['narrow'] = {'rows': count, 'expected': True}
+
+    # The converters only tell tabs and commas apart, so a pipe delimited file is expected to end up in Problem.
+    count = max(1, int(rows * shares['pipe']))
+    write_text(folder, "pipe", ".txt", '|', count, header_variants[2], ['slashed', 'slashed', 'slashed'], rng)
+    os.remove(os.path.join(folder, "Expected", "pipe.txt"))
+    manifest['pipe'] = {'rows': count, 'expected': False}
+
+    if xlwt is not None:
+        count = max(1, int(rows * shares['book']))
+        write_book(folder, "book", count, header_variants[2], rng)
+        manifest['book'] = {'rows': count, 'expected': True}
+
+    write_report(folder, "report", rows, rng)
+    for name in manifest:
+        manifest[name]['expected'] = manifest[name]['expected'] and os.path.join(folder, "Expected", name + ".txt")
+    return manifest
+
+
+# Makes up the values for one row, in the order of the target header. The dates are left as dates.
+def record(i, rng):
+    start = datetime.date(2014, 1, 1)
+    invoice = start + datetime.timedelta(days=rng.randrange(900))
+    payment = None
+    if rng.random() > 0.05:
+        payment = invoice + datetime.timedelta(days=rng.randrange(15, 90))
+    entered = invoice + datetime.timedelta(days=rng.randrange(0, 10))
+    return ['Acme %d' % (i % 997), str(1000 + i % 4999), 'INV%07d' % i, '%.2f' % (rng.randrange(100, 10000000) / 100),
+            rng.choice(['', 'EUR', 'USD', 'CAD']), invoice, payment, entered]
+
+
+# Formats a date the way the converters should write it, or blank for a missing one.
+def normal_date(date):
+    if date is None:
+        return ''
+    return date.strftime("%m/%d/%Y")
+
+
+# Writes a delimited text file, with the columns shuffled, its dates in the given styles, the columns in drop left
+# out and an unknown column added in, if there is one. The expected rows are written next to it.
+def write_text(folder, name, extension, delimiter, count, variant, styles, rng, quote=False, drop=(), extra=None):
+    columns = [i for i in range(len(target)) if target[i] not in drop]
+    rng.shuffle(columns)
+    heading = [variant[i] for i in columns]
+    if extra is not None:
+        heading.append(extra)
+    formats = dict(zip((5, 6, 7), [date_styles[style] for style in styles]))
+
+    source = open(os.path.join(folder, "Source", name + extension), 'w', newline='')
+    expected = open(os.path.join(folder, "Expected", name + ".txt"), 'w', newline='')
+    with source, expected:
+        writer = csv.writer(source, delimiter=delimiter, quoting=csv.QUOTE_ALL if quote else csv.QUOTE_NONE,
+                            quotechar='"', escapechar='\\', lineterminator='\n')
+        check = csv.writer(expected, delimiter='\t', lineterminator='\n')
+        writer.writerow(heading)
+        for i in range(count):
+            values = record(i, rng)
+            cells = []
+            for column in columns:
+                value = values[column]
+                if column in formats:
+                    value = '' if value is None else value.strftime(formats[column])
+                cells.append(value)
+            if extra is not None:
+                cells.append("note %d" % i)
+            writer.writerow(cells)
+
+            row = [normal_date(value) if column in formats else value for column, value in enumerate(values)]
+            row[4] = row[4] or "USD"
+            for column in range(len(target)):
+                if target[column] in drop:
+                    row[column] = ''
+            check.writerow(row)
+
+
+# Writes an .xls workbook, with a hidden ghost sheet in front and the rows spread over as many sheets as it takes,
+# each with the header on top. Dates go in as Excel serial numbers and the supplier numbers as floats, the way they
+# come out of Excel.
+def write_book(folder, name, count, variant, rng, per_sheet=60000):
+    book = xlwt.Workbook()
+    ghost = book.add_sheet("Ghost")
+    ghost.write(0, 0, "Ghost header")
+    ghost.visibility = 2
+    epoch = datetime.date(1899, 12, 30)
+
+    with open(os.path.join(folder, "Expected", name + ".txt"), 'w', newline='') as expected:
+        check = csv.writer(expected, delimiter='\t', lineterminator='\n')
+        sheet = None
+        for i in range(count):
+            if i % per_sheet == 0:
+                sheet = book.add_sheet("Sheet%d" % (i // per_sheet + 1))
+                for column in range(len(variant)):
+                    sheet.write(0, column, variant[column])
+            values = record(i, rng)
+            cells = list(values)
+            cells[1] = float(values[1])
+            for column in (5, 6, 7):
+                cells[column] = '' if values[column] is None else float((values[column] - epoch).days)
+            for column in range(len(cells)):
+                sheet.write(i % per_sheet + 1, column, cells[column])
+
+            row = [normal_date(value) if column in (5, 6, 7) else value for column, value in enumerate(values)]
+            row[4] = row[4] or "USD"
+            check.writerow(row)
+    book.save(os.path.join(folder, "Source", name + ".xls"))
+
+
+# Writes a report for the Rectifier, with its columns lined up by runs of spaces. The Rectifier only changes the
+# delimiters, so the rows it should come out with are the cells as they are.
+def write_report(folder, name, count, rng):
+    heading = ['Vendor Name', 'Vendor ID', 'Invoice Id', 'Gross Amount', 'Currency', 'Invoice Date', 'Payment Date',
+               'Entered Date']
+    widths = [16, 12, 14, 14, 10, 14, 14, 14]
+
+    source = open(os.path.join(folder, "Problem", name + ".txt"), 'w')
+    expected = open(os.path.join(folder, "Expected", name + ".txt"), 'w', newline='')
+    with source, expected:
+        check = csv.writer(expected, delimiter='\t', lineterminator='\n')
+        source.write(align(heading, widths))
+        for i in range(count):
+            values = record(i, rng)
+            values[4] = values[4] or "USD"
+            values[6] = values[6] or values[5]
+            cells = values[:5] + [normal_date(date) for date in values[5:]]
+            source.write(align(cells, widths))
+            check.writerow(cells)
+
+
+def align(cells, widths):
+    line = ''
+    for i in range(len(cells)):
+        line += cells[i].ljust(widths[i]) + '  '
+    return line.rstrip() + '\n'
+
+
+# Runs the main, after establishing that this is not a library.
+if __name__ == "__main__":
+    main()
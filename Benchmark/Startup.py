@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""
+Startup
+Cold start time of the converters and the Rectifier.
+
+Runs each program over an empty folder a number of times, so that all there is to time is starting up, importing and
+looking through the folders, and reports the fastest, median and slowest run. By default the scripts are run with
+this Python. Frozen builds can be timed instead, by passing their executables with --exe.
+
+    python Startup.py [--runs 10] [--programs Tabbed Pipe Rectifier] [--exe "build/Pipe Converter.exe" ...]
+    python Startup.py --imports
+
+With --imports, the slowest imports of each script are listed too, from python -X importtime.
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import argparse
+import statistics
+import subprocess
+
+repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+programs = {'Tabbed': os.path.join(repo, "Converters", "Tabbed.py"),
+            'Pipe': os.path.join(repo, "Converters", "Pipe Converter.py"),
+            'Rectifier': os.path.join(repo, "Rectifier", "Rectifier.py")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Times how long the converters take to start up.")
+    parser.add_argument('--runs', type=int, default=10, help="times to run each program")
+    parser.add_argument('--programs', nargs='+', choices=sorted(programs), default=['Tabbed', 'Pipe', 'Rectifier'],
+                        help="scripts to run")
+    parser.add_argument('--exe', nargs='+', default=[], help="frozen executables to run instead of the scripts")
+    parser.add_argument('--imports', action='store_true', help="list the slowest imports of each script")
+    args = parser.parse_args()
+
+    commands = [(os.path.basename(exe), [os.path.abspath(exe)]) for exe in args.exe]
+    if not commands:
+        commands = [(name, [sys.executable, programs[name]]) for name in args.programs]
+
+    print("%-24s %9s %9s %9s" % ("program", "fastest", "median", "slowest"))
+    for name, command in commands:
+        times = [run(command) for i in range(args.runs)]
+        print("%-24s %7.0fms %7.0fms %7.0fms" % (name, min(times) * 1000, statistics.median(times) * 1000,
+                                                 max(times) * 1000))
+        if args.imports and not args.exe:
+            for line in slowest_imports(command):
+                print("    %s" % line)
+
+
+# Runs a program once, under a throwaway home folder with empty Desktop folders. Returns how long it took.
+def run(command, env=None):
+    home = tempfile.mkdtemp(prefix="startup-")
+    try:
+        for folder in ("Source", "Problem"):
+            os.makedirs(os.path.join(home, "Desktop", folder))
+        env = dict(os.environ, HOME=home, USERPROFILE=home, **(env or {}))
+        start = time.perf_counter()
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+# The modules that took the longest to import, counting what they imported in turn, for a script run with -X importtime.
+def slowest_imports(command, count=8):
+    home = tempfile.mkdtemp(prefix="startup-")
+    try:
+        for folder in ("Source", "Problem"):
+            os.makedirs(os.path.join(home, "Desktop", folder))
+        env = dict(os.environ, HOME=home, USERPROFILE=home)
+        result = subprocess.run([command[0], "-X", "importtime"] + command[1:], env=env, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.PIPE, universal_newlines=True)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and not line.endswith("package"):
+            fields = line[len("import time:"):].split('|')
+            # Only the modules imported by the script itself, not by other modules.
+            if fields[1].strip().isdigit() and not fields[2].startswith('  '):
+                imports.append((int(fields[1]), fields[2].strip()))
+    imports.sort(reverse=True)
+    return ["%6.1fms %s" % (microseconds / 1000, module) for microseconds, module in imports[:count]]
+
+
+# Runs the main, after establishing that this is not a library.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2441 @@
+#!/usr/bin/env python3
+"""
+Normalizer
+The code both converters run on, and the converters as a library.
+
+Tabbed and Pipe Converter are thin scripts over this module. Each runs main with its own name and dialect: Tabbed
+writes tab delimited parts, and Pipe Converter pipe delimited ones with the header at the top of each. Everything in
+between, from reading the files on the Desktop to splitting up what is written, is the same for both, and is here.
+
+The same conversion can be had by a program that wants to do it itself, a file or a set of rows at a time, without
+starting up a converter for each one or going through the Desktop. A Normalizer is set up once, with the header to
+convert into, the aliases its columns go by, the dialect to write in and how to split what it writes, and keeps what it
+compiles from them for every file after.
+
+    import Normalizer
+
+    tabbed = Normalizer.Normalizer()
+    for row in tabbed.normalize_file("vendor.txt"):
+        ...
+
+    pipe = Normalizer.Normalizer(**Normalizer.pipe_dialect)
+    parts = pipe.write_file("vendor.xls", "/data/Target")
+
+The rows come out in the order of the header, formatted the way the converters write them, and are read and formatted
+one at a time as they are asked for. A file that can't be converted raises the error the converters would have sent it
+to the Problem folder for, and so does a row, since there is no reject file to set it aside in.
+"""
+
+import os
+import datetime
+import time
+import csv
+import shutil
+import argparse
+import functools
+import itertools
+import collections
+import locale
+import io
+import re
+import mmap
+import array
+import importlib
+import hashlib
+import json
+import gzip
+import bz2
+import lzma
+import zipfile
+import threading
+import queue
+import tracemalloc
+from concurrent import futures
+from xml.etree import ElementTree
+
+
+# Stands in for a module that is only imported the first time something on it is used, so that starting up doesn't
+# pay for what a run never needs: xlrd until an Excel file comes up, and so on. Anything else in the program uses it
+# just like the module. The standard library modules that cost next to nothing, or that are imported along with the
+# rest anyway, are imported as usual.
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        return getattr(self._import(), attribute)
+
+    def _import(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+
+xlrd = LazyModule('xlrd')
+fuzz = LazyModule('fuzzywuzzy.fuzz')
+sqlite3 = LazyModule('sqlite3')
+
+
+# Runs a converter over the folders on the Desktop. program is the name of the converter, and dialect one of the
+# dialects below, which it writes its files in.
+def main(program, dialect):
+    parser = argparse.ArgumentParser(description="Normalizes the files in the Source folder on your Desktop.")
+    parser.add_argument('--stream', action='store_true',
+                        help="pass the rows through one at a time instead of loading each file whole")
+    parser.add_argument('--workers', type=int, nargs='?', default=1, const=os.cpu_count(),
+                        help="convert this many files at once (every core if no number is given)")
+    parser.add_argument('--part-rows', type=int, default=125000,
+                        help="start a new part of the output every this many rows")
+    parser.add_argument('--part-size', type=int,
+                        help="start a new part of the output once a part reaches about this many bytes")
+    parser.add_argument('--compress', choices=sorted(compressors),
+                        help="write the output through this compressor, one compressed file per part")
+    parser.add_argument('--level', type=int, choices=range(10), metavar='0-9',
+                        help="compression level to use with --compress")
+    parser.add_argument('--sqlite', nargs='?', const="normalized.db",
+                        help="load the rows into this SQLite database in the Target folder instead of writing text "
+                             "files (normalized.db if no name is given)")
+    parser.add_argument('--index', action='store_true',
+                        help="index Supplier Number and Reference once everything is loaded into SQLite")
+    parser.add_argument('--watch', type=float, nargs='?', const=0.5, metavar='SECONDS',
+                        help="keep running and convert new files as soon as they are complete, looking at the Source "
+                             "folder this often (every half second if no number is given)")
+    parser.add_argument('--cache', type=int, nargs='?', const=1024, metavar='MB',
+                        help="reuse the output of files that were converted before, keeping up to this many megabytes "
+                             "of it in a Cache folder on your Desktop (1024 if no number is given)")
+    parser.add_argument('--clear-cache', action='store_true',
+                        help="empty the Cache folder before starting")
+    parser.add_argument('--profile', nargs='?', const='', metavar='FILE',
+                        help="time each stage of each file, and write a JSON report of it to this file (to the Target "
+                             "folder if no name is given)")
+    parser.add_argument('--pipeline', type=int, nargs='?', const=256, metavar='MB',
+                        help="read the next files in and write the last ones out on threads of their own while each "
+                             "file is converted, holding up to this many megabytes of source files in between (256 if "
+                             "no number is given)")
+    parser.add_argument('--checkpoint', action='store_true',
+                        help="keep a checkpoint next to the output of each file as it is streamed, and pick up from it "
+                             "if the file was cut off the last time")
+    parser.add_argument('--file-workers', type=int, nargs='?', default=1, const=os.cpu_count(),
+                        help="split very large text files across this many processes, when converting one file at "
+                             "a time (every core if no number is given)")
+    args = parser.parse_args()
+    if args.level is not None:
+        if args.compress is None:
+            parser.error("--level only applies to --compress")
+        if args.level < compressors[args.compress][2]:
+            parser.error("%s can't compress at level %d" % (args.compress, args.level))
+
+    source = "Source"
+    new_header = list(target_header)
+    print("\nYour new files will be saved in a folder on your Desktop called 'Target'")
+    new_folder = "Target"
+
+    mode = "stream" if args.stream else "batch"
+    output = dict(dialect, program=program, rows=args.part_rows, size=args.part_size, compress=args.compress,
+                  level=args.level, sqlite=args.sqlite, index=args.index, cache=args.cache and args.cache * 1024 * 1024,
+                  profile=args.profile, pipeline=args.pipeline and args.pipeline * 1024 * 1024)
+    if args.pipeline is not None and (mode != "batch" or args.workers > 1 or args.file_workers > 1 or
+                                      args.profile is not None):
+        print("The pipeline only works on one file at a time in batch mode without profiling, so it won't be used.")
+        output['pipeline'] = None
+    if args.checkpoint:
+        if args.sqlite is not None:
+            print("Checkpoints can't be kept when loading into SQLite, so they won't be.")
+        else:
+            if mode != "stream" or args.file_workers > 1 or output['pipeline']:
+                print("Checkpoints are kept as each file is streamed on its own, so the files will be streamed.")
+            mode = "stream"
+            args.file_workers = 1
+            output['pipeline'] = None
+            output['checkpoints'] = True
+    if args.clear_cache:
+        clear_cache()
+    if args.watch is not None:
+        watch(source, new_header, new_folder, mode, args.workers, args.file_workers, output, args.watch)
+    else:
+        cycle(source, new_header, new_folder, mode, args.workers, args.file_workers, output)
+
+
+# The header the files are converted into.
+target_header = ['Supplier Name', 'Supplier Number', 'Reference', 'Amount', 'Currency', 'Invoice Date', 'Payment Date',
+                 'Entered Date']
+
+# The dialects the two converters write in: the delimiter, whether every part has the header on top, and how far over
+# the split size a file can run before it is split.
+tabbed_dialect = {'delimiter': '\t', 'headed': False, 'slack': 0}
+pipe_dialect = {'delimiter': '|', 'headed': True, 'slack': 0.1}
+
+
+# Cycles through every single folder in the path, converting each file to an excel file.
+# In "stream" mode, each file goes through the generator pipeline below instead, so that only one row is held at a time.
+# With more than one worker, the files are handed out to a pool of processes, since each one stands on its own.
+# Otherwise, file_workers processes can be put to work on the inside of each large file instead, or the files can go
+# through pipelined, which reads and writes on threads while converting. output holds the settings for writing the
+# converted files, which are passed along to RollingWriter, or to SQLiteWriter when they name a database.
+# Each file is settled as soon as it is done with, so that a run that is cut off doesn't convert them all over again.
+def cycle(source, header, new_folder, mode="batch", workers=1, file_workers=1, output=None):
+    folder_path = os.path.expanduser('~') + "/Desktop/" + source + "/"
+    file_names = seek(folder_path)
+    save_pathway = direct(new_folder)
+    problem_pathway = direct("Problem/")
+    if output is not None and output.get('sqlite'):
+        output = prepare_database(output, header, save_pathway)
+    if output is not None and output.get('cache'):
+        output = dict(output, cache_pathway=direct("Cache"))
+
+    task = process
+    if output is not None and output.get('profile') is not None:
+        task = profiled
+
+    def finished(x, result):
+        if isinstance(result, dict):
+            result = result['converted']
+        settle(folder_path, file_names[x], result, problem_pathway, source)
+
+    if workers > 1:
+        with futures.ProcessPoolExecutor(workers) as executor:
+            results = []
+            for result in collect([executor.submit(task, folder_path, name, header, save_pathway, mode, 1, output)
+                                   for name in file_names]):
+                finished(len(results), result)
+                results.append(result)
+    elif output is not None and output.get('pipeline'):
+        results = pipelined(folder_path, file_names, header, save_pathway, output, finished)
+    else:
+        results = []
+        for name in file_names:
+            results.append(task(folder_path, name, header, save_pathway, mode, file_workers, output))
+            finished(len(results) - 1, results[-1])
+    if task is profiled:
+        results = write_profile(results, file_names, mode, output, save_pathway)
+    if output is not None and output.get('sqlite'):
+        finish_database(output)
+    print("%d of %d files converted" % (results.count(True), len(file_names)))
+
+
+# Daemon mode. Keeps watching the source folder, and converts each file that shows up as soon as it is complete, which
+# is taken to be once its size and modification time hold still from one look to the next. Everything built up along
+# the way, like the compiled header matchers, stays in memory from one file to the next, and so does the pool of
+# processes when there is more than one worker. Runs until it is interrupted.
+def watch(source, header, new_folder, mode="batch", workers=1, file_workers=1, output=None, interval=0.5):
+    folder_path = os.path.expanduser('~') + "/Desktop/" + source + "/"
+    save_pathway = direct(new_folder)
+    problem_pathway = direct("Problem/")
+    if output is not None and output.get('sqlite'):
+        output = prepare_database(output, header, save_pathway)
+    if output is not None and output.get('cache'):
+        output = dict(output, cache_pathway=direct("Cache"))
+    executor = None
+    if workers > 1:
+        executor = futures.ProcessPoolExecutor(workers)
+    task = process
+    if output is not None and output.get('profile') is not None:
+        task = profiled
+
+    print("Watching %s for new files. Press Ctrl+C to stop." % folder_path)
+    seen = {}
+    # Files that could not be cleared out of the source folder, either moved to the problem folder or removed, which
+    # are left alone until they change.
+    left = {}
+    try:
+        while True:
+            sizes = {}
+            for name in seek(folder_path):
+                try:
+                    stat = os.stat("%s%s" % (folder_path, name))
+                except OSError:
+                    continue
+                if not os.path.isdir("%s%s" % (folder_path, name)) and left.get(name) != (stat.st_size, stat.st_mtime):
+                    sizes[name] = (stat.st_size, stat.st_mtime)
+            ready = [name for name in sorted(sizes) if seen.get(name) == sizes[name]]
+            seen = sizes
+
+            if ready:
+                if executor is None:
+                    results = [task(folder_path, name, header, save_pathway, mode, file_workers, output)
+                               for name in ready]
+                else:
+                    results = list(collect([executor.submit(task, folder_path, name, header, save_pathway, mode, 1,
+                                                            output) for name in ready]))
+                if task is profiled:
+                    results = write_profile(results, ready, mode, output, save_pathway)
+                for x in range(0, len(ready)):
+                    if not settle(folder_path, ready[x], results[x], problem_pathway, source):
+                        left[ready[x]] = seen[ready[x]]
+                    del seen[ready[x]]
+                if output is not None and output.get('sqlite'):
+                    finish_database(output)
+                print("%d of %d files converted" % (results.count(True), len(ready)))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching %s" % folder_path)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+# Waits on the files handed out to a pool of processes, in order. Gives whether each one went through, as soon as it
+# has.
+def collect(pending):
+    for future in pending:
+        # A worker that dies outright counts as a failure too.
+        try:
+            result = future.result()
+        except:
+            result = False
+        yield result
+
+
+# Sources are only deleted once they are taken care of, either converted or safely in the problem folder. Returns
+# whether the source is gone.
+def settle(folder_path, file_name, result, problem_pathway, source):
+    if not result:
+        try:
+            # Move file to the problem folder.
+            shutil.copy("%s%s" % (folder_path, file_name), "%s%s" % (problem_pathway, file_name))
+        except OSError:
+            print("Could not move %s to the problem folder. It was left in %s." % (file_name, source))
+            return False
+    try:
+        os.remove("%s%s" % (folder_path, file_name))
+    except OSError:
+        print("Could not remove %s. It was left in %s." % (file_name, source))
+        return False
+    return True
+
+
+# Converts the files of a batch as a pipeline of three stages, each on its own thread, so that the next file is read in
+# and the last one is written out while the one in between is being converted: a reader, which loads each file whole,
+# or gets it out of the result cache, the conversion itself, and a writer. The stages hand the files along through
+# queues that only hold a couple of them, and the source files held anywhere along the way may not add up to more
+# than output['pipeline'] bytes, so that a reader running ahead doesn't fill up the memory. A file bigger than that is
+# let through on its own. Returns whether each file went through, like process does for one, and hands each one to
+# finished as soon as it is known.
+def pipelined(folder_path, file_names, header, save_pathway, output, finished=None):
+    results = [False] * len(file_names)
+    budget = Budget(output['pipeline'])
+    read, written = queue.Queue(2), queue.Queue(2)
+    if output.get('cache_pathway'):
+        load_headers(output['cache_pathway'])
+
+    def reader():
+        for x in range(len(file_names)):
+            name = "%s%s" % (folder_path, file_names[x])
+            filename = os.path.splitext(file_names[x])[0]
+            try:
+                case = file_case(filename)
+                key = None
+                if output.get('cache_pathway') and not output.get('database'):
+                    key = cache_key(name, header, case, output)
+                    if reuse_cached(key, filename, save_pathway, output):
+                        print("Reused")
+                        results[x] = True
+                        done(x)
+                        continue
+                size = os.path.getsize(name)
+                budget.acquire(size)
+                try:
+                    raw_data, date_mode = prefetch(name)
+                except:
+                    budget.release(size)
+                    raise
+            except:
+                done(x)
+                continue
+            read.put((x, filename, case, key, raw_data, date_mode, size))
+        read.put(None)
+
+    def writer():
+        for x, filename, key, row, size, aside in iter(written.get, None):
+            settings = dict(output, parts=[])
+            try:
+                convert(row, filename, save_pathway, header, settings)
+                results[x] = True
+            except:
+                aside.discard()
+                discard_parts(settings)
+            finally:
+                budget.release(size)
+            if results[x] and key is not None and not aside.count:
+                try:
+                    store_cached(key, settings)
+                except OSError:
+                    pass
+            done(x)
+
+    def done(x):
+        if finished is not None:
+            finished(x, results[x])
+
+    global quarantine
+    threading.Thread(target=reader, daemon=True).start()
+    writing = threading.Thread(target=writer)
+    writing.start()
+    try:
+        for x, filename, case, key, raw_data, date_mode, size in iter(read.get, None):
+            print('Cycle start')
+            aside = quarantine = Quarantine(filename)
+            try:
+                row = normalize(raw_data, date_mode, header, case)
+                check_kept(len(row), aside)
+                aside.close()
+            except:
+                aside.discard()
+                budget.release(size)
+                done(x)
+                continue
+            finally:
+                del raw_data
+                quarantine = None
+            written.put((x, filename, key, row, size, aside))
+    finally:
+        # The reader is done once it has handed over the end, and is left behind if the conversion was interrupted.
+        written.put(None)
+        writing.join()
+    return results
+
+
+# Keeps count of how many bytes of source files the pipeline holds, and holds up whoever wants to take on more than
+# the limit allows until enough is given back.
+class Budget:
+    def __init__(self, limit):
+        self.limit = limit
+        self.held = 0
+        self.condition = threading.Condition()
+
+    def acquire(self, size):
+        with self.condition:
+            while self.held and self.held + size > self.limit:
+                self.condition.wait()
+            self.held += size
+
+    def release(self, size):
+        with self.condition:
+            self.held -= size
+            self.condition.notify_all()
+
+
+# Reads a whole file in for the pipeline, the way read_txt_file would give it. Text files are decoded up front, since
+# the point is to have them in memory before they are needed, rather than mapped.
+def prefetch(name):
+    with open(name, 'rb') as f:
+        signature = f.read(4)
+        if signature in (b'\xd0\xcf\x11\xe0', b'PK\x03\x04'):
+            return read_txt_file(name)
+        text = (signature + f.read()).decode(locale.getpreferredencoding(False), 'surrogateescape')
+
+    # Line breaks are turned into '\n' the way reading the file as text would.
+    lines = [line + '\n' for line in text.replace('\r\n', '\n').replace('\r', '\n').split('\n')]
+    last = lines.pop()[:-1]
+    if last:
+        # The last line doesn't end with a line break.
+        lines.append(last)
+    return lines, 3
+
+
+# The rows of a file that couldn't be converted, which are set aside in a reject file in the Rejects folder on the
+# Desktop while the rest of the file goes through. Each one goes on a line of its own, tab delimited: the line of the
+# source file it was on, why it was set aside, and its cells. The reject file is only made once there is something to
+# put in it, and is kept in the bytes the source file was in.
+class Quarantine:
+    def __init__(self, save):
+        self.save = save
+        self.name = None
+        self.file = None
+        self.writer = None
+        self.count = 0
+        # The lines of the source file the rows of a batch came from, and its columns as they were read, before any
+        # were dropped or added, kept by colify for general_parse.
+        self.lines = []
+        self.columns = []
+
+    def reject(self, line, reason, cells):
+        if self.writer is None:
+            self.name = "%s/%s (rejects).txt" % (direct("Rejects"), self.save)
+            self.file = open(self.name, 'w', newline='', errors='surrogateescape')
+            self.writer = csv.writer(self.file, delimiter='\t', lineterminator='\n')
+            self.writer.writerow(['Line', 'Reason', 'Cells'])
+        self.writer.writerow([line, reason] + list(cells))
+        self.count += 1
+
+    # How far into the reject file it has got, for a checkpoint.
+    def position(self):
+        if self.file is None:
+            return 0
+        self.file.flush()
+        return self.file.tell()
+
+    # Carries on with the reject file of a run that was cut off, from where its checkpoint was made.
+    def resume(self, position, count):
+        if position:
+            self.name = "%s/%s (rejects).txt" % (direct("Rejects"), self.save)
+            with open(self.name, 'r+') as f:
+                f.truncate(position)
+            self.file = open(self.name, 'a', newline='', errors='surrogateescape')
+            self.writer = csv.writer(self.file, delimiter='\t', lineterminator='\n')
+            self.count = count
+
+    # Closes the reject file. Returns how many rows were set aside.
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            print("%d rows set aside in %s" % (self.count, self.name))
+        return self.count
+
+    # Throws the reject file away, for a file that isn't going through after all.
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.name is not None and os.path.exists(self.name):
+            os.remove(self.name)
+
+
+# The Quarantine of the file being converted, or None outside of process. Without one, a row that can't be converted
+# fails the whole file, like it used to.
+quarantine = None
+
+
+# A file that had every one of its rows set aside didn't go through at all, so it fails, and goes to the Problem folder
+# like it used to, rather than leaving an empty file in Target. A file with no rows to begin with goes through.
+def check_kept(kept, aside):
+    if not kept and aside is not None and aside.count:
+        raise ValueError("all %d rows were set aside" % aside.count)
+
+
+def set_aside(line, reason, cells):
+    if quarantine is None:
+        raise ValueError("line %d has %s" % (line, reason))
+    if profile is not None:
+        count('rows set aside')
+    quarantine.reject(line, reason, cells)
+
+
+# Checkpoints, for streaming a file that a run might not get to the end of. Every time a part of the output is finished,
+# once it is safely on disk, what it takes to carry on from there is saved next to the output: how far into the source
+# file it had got, in bytes and lines, how many parts and rows were written, and the header, dialect and date formats
+# it was read with. If the run is cut off, the next run over the same file starts again from there rather than from the
+# top, so all that is done over is the part that was being written. A checkpoint is only used for the same file, unchanged,
+# converted the same way, and is thrown out once the file is done with. Only text files with a sniffed dialect can be
+# picked up part way, since Excel files can't be read from the middle.
+class Checkpoint:
+    def __init__(self, name, save, pathway, header, case, output, quarantine):
+        self.name = name
+        self.path = "%s/%s (checkpoint).json" % (pathway, save)
+        self.quarantine = quarantine
+        stat = os.stat(name)
+        self.source = [stat.st_size, stat.st_mtime_ns, output.get('program'), rules_version, list(header), case,
+                       [output.get(setting) for setting in ('rows', 'size', 'compress', 'level')]]
+        self.dialect = None
+        self.heading = None
+        self.formats = None
+        # Where the source has been read up to, and the line of the row last handed to the writer.
+        self.read = None
+        self.line = None
+        self.marked = None
+
+        self.saved = None
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+            if saved['source'] == self.source and all(os.path.exists(part) for part in saved['parts']):
+                self.saved = saved
+                self.dialect = saved['dialect']
+                self.heading = saved['heading']
+                self.formats = saved['formats']
+                quarantine.resume(saved['rejects'], saved['rejected'])
+                print("Picking %s up from part %d" % (save, saved['part']))
+        except (OSError, ValueError, KeyError):
+            pass
+
+    # Passes the rows along to the writer, keeping track of which line each came from.
+    def follow(self, numbered):
+        for line, row in numbered:
+            self.line = line
+            yield row
+
+    # Notes where the source is at, once the writer has filled a part with the row it was just handed. It has to have
+    # been read up to that row and no further, which it always is but for the first few rows.
+    def mark(self):
+        self.marked = None
+        if self.read is not None and self.read[0] == self.line:
+            self.marked = {'line': self.read[0], 'offset': self.read[1], 'rejects': self.quarantine.position(),
+                           'rejected': self.quarantine.count}
+
+    # Saves the checkpoint, once the writer has finished off the parts before the one numbered part. A part that
+    # wasn't marked is just written over if the run is picked up again.
+    def commit(self, part, now, rows, parts):
+        if self.marked is None or self.dialect is None:
+            return
+        state = dict(self.marked, source=self.source, part=part, now=now, rows=rows, parts=parts,
+                     dialect=self.dialect, heading=self.heading, formats=self.formats)
+        with open(self.path + ".tmp", 'w') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(self.path + ".tmp", self.path)
+        self.marked = None
+
+    def done(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# Makes sure a file that has been written and closed is on disk, and not just on its way there.
+def sync(name):
+    with open(name, 'ab') as f:
+        os.fsync(f.fileno())
+
+
+# Profiling. When it is on, each file is converted by profiled instead of process, and every stage of it is run
+# through staged, or metered for the stages of the streaming pipeline, which pass rows along one at a time. Each stage
+# gets its wall and CPU time, not counting the stages it calls on, its rows in and out, and the peak memory allocated
+# while it ran. Fuzzy matches and dates that didn't fit their column's format are counted along the way. When it is
+# off, profile is None, and that is all the instrumented code ever looks at.
+profile = None
+
+
+# Converts one file like process does, with the profiler on. Returns the profile of the file, which also says whether
+# it went through.
+def profiled(folder_path, file_name, *args):
+    global profile
+    profile = {'file': file_name, 'stages': [], 'counters': collections.Counter(), 'stack': []}
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        converted = process(folder_path, file_name, *args)
+    finally:
+        record = profile
+        profile = None
+        record['wall'] = time.perf_counter() - wall
+        record['cpu'] = time.process_time() - cpu
+        record['peak memory'] = tracemalloc.get_traced_memory()[1]
+        if not tracing:
+            tracemalloc.stop()
+
+    del record['stack']
+    record['counters'] = dict(record['counters'])
+    record['converted'] = converted
+    stages = record['stages']
+    for i in range(1, len(stages)):
+        if stages[i]['rows in'] is None:
+            stages[i]['rows in'] = stages[i - 1]['rows out']
+        # The writers write out every row they are given.
+        if stages[i]['stage'] in ('convert', 'stream_convert') and stages[i]['rows out'] is None:
+            stages[i]['rows out'] = stages[i]['rows in']
+    return record
+
+
+# Runs one stage of a file.
+def staged(name, function, *args):
+    if profile is None:
+        return function(*args)
+    entry = stage_entry(name)
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        result = timed(entry, function, *args)
+        entry['peak memory'] = tracemalloc.get_traced_memory()[1] - base
+    else:
+        result = timed(entry, function, *args)
+
+    if name in ('colify', 'simplify', 'general_parse', 'order'):
+        # These hand over columns, with the header on top of each.
+        entry['rows out'] = len(result[0]) - 1 if result else 0
+    elif name == 'read_txt_file':
+        entry['rows out'] = len(result[0])
+    elif name == 'rowify':
+        entry['rows out'] = len(result)
+    return result
+
+
+# Wraps the rows a stage of the streaming pipeline passes along, so that the time spent getting each one is put down
+# to that stage.
+def metered(name, rows):
+    if profile is None:
+        return rows
+    entry = stage_entry(name)
+    entry['rows out'] = 0
+    return meter(entry, iter(rows))
+
+
+def meter(entry, rows):
+    while True:
+        try:
+            row = timed(entry, next, rows)
+        except StopIteration:
+            return
+        entry['rows out'] += 1
+        yield row
+
+
+def stage_entry(name):
+    entry = {'stage': name, 'wall': 0.0, 'cpu': 0.0, 'rows in': None, 'rows out': None, 'peak memory': None}
+    profile['stages'].append(entry)
+    return entry
+
+
+# Times a call for a stage. The stage that was running when it was made doesn't get that time too.
+def timed(entry, function, *args):
+    stack = profile['stack']
+    stack.append(entry)
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        return function(*args)
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        stack.pop()
+        entry['wall'] += wall
+        entry['cpu'] += cpu
+        if stack:
+            stack[-1]['wall'] -= wall
+            stack[-1]['cpu'] -= cpu
+
+
+def count(counter, n=1):
+    profile['counters'][counter] += n
+
+
+# Writes the profiles of a run out as JSON, to the file output names, or to the Target folder. Returns whether each
+# file went through, the way process would have. A file whose worker died outright has no profile.
+def write_profile(results, file_names, mode, output, save_pathway):
+    records = [result for result in results if isinstance(result, dict)]
+    counters = collections.Counter()
+    for record in records:
+        counters.update(record['counters'])
+    report = {'program': output.get('program'), 'mode': mode, 'finished': datetime.datetime.now().isoformat(),
+              'files': len(file_names), 'wall': sum(record['wall'] for record in records),
+              'cpu': sum(record['cpu'] for record in records), 'counters': dict(counters), 'profiles': records}
+
+    name = output['profile'] or "%s/Profile (%s).json" % (save_pathway,
+                                                         datetime.datetime.now().strftime("%m.%d.%y %H.%M.%S"))
+    with open(name, 'w') as f:
+        json.dump(report, f, indent=2)
+    print("Profile written to %s" % name)
+    return [result['converted'] if isinstance(result, dict) else result for result in results]
+
+
+# Converts one file from the source folder. Returns whether it went through. With the result cache on, a file that
+# was converted before under the same profile just gets its old output back, and a newly converted one is cached.
+# Rows that can't be converted are set aside by the file's Quarantine, and only a fault with the file as a whole, like
+# a missing header, holds the whole file back. Files with rows set aside aren't cached, so that their rejects are
+# written again the next time.
+def process(folder_path, file_name, header, save_pathway, mode="batch", file_workers=1, output=None):
+    global quarantine
+    print('Cycle start')
+    # Catches errors with the try, except structure.
+    try:
+        filename = os.path.splitext(file_name)[0]
+        case = file_case(filename)
+
+        if output is not None and output.get('cache_pathway'):
+            load_headers(output['cache_pathway'])
+
+        key = None
+        if output is not None and output.get('cache_pathway') and not output.get('database'):
+            key = cache_key("%s%s" % (folder_path, file_name), header, case, output)
+            if reuse_cached(key, filename, save_pathway, output):
+                print("Reused")
+                return True
+        # The parts that get written, for the result cache, or to be thrown away if the file fails after all.
+        output = dict(output or tabbed_dialect, parts=[])
+
+        quarantine = Quarantine(filename)
+        if output is not None and output.get('checkpoints'):
+            output = dict(output, checkpoint=Checkpoint("%s%s" % (folder_path, file_name), filename, save_pathway,
+                                                        header, case, output, quarantine))
+        if file_workers > 1:
+            staged("split_stream", split_stream, "%s%s" % (folder_path, file_name), filename, header, case,
+                   save_pathway, file_workers, output)
+        elif mode == "stream":
+            stream("%s%s" % (folder_path, file_name), filename, header, case, save_pathway, output)
+        else:
+            raw_data, date_mode = staged("read_txt_file", read_txt_file, "%s%s" % (folder_path, file_name))
+            try:
+                row = normalize(raw_data, date_mode, header, case)
+            finally:
+                unmap(raw_data)
+            staged("convert", convert, row, filename, save_pathway, header, output)
+        rejected = quarantine.close()
+    except KeyboardInterrupt:
+        # Left as it is, checkpoint and all, to be picked up again.
+        raise
+    except:
+        if quarantine is not None:
+            quarantine.discard()
+        discard_parts(output)
+        if output is not None and output.get('checkpoint'):
+            output['checkpoint'].done()
+        return False
+    finally:
+        quarantine = None
+
+    if output is not None and output.get('checkpoint'):
+        output['checkpoint'].done()
+
+    if key is not None and not rejected:
+        # The file went through either way, so a cache that can't be written to is no reason to fail it.
+        try:
+            store_cached(key, output)
+        except OSError:
+            pass
+    return True
+
+
+# Throws away the parts written for a file that failed part of the way through, so that nothing is left of it in the
+# Target folder.
+def discard_parts(output):
+    if output is not None:
+        for name, suffix in output.get('parts') or []:
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+
+
+# Files from some vendors have headers of their own, which get a hash map of their own.
+def file_case(filename):
+    case = None
+    issues = ['Summa', 'VCU']
+    for key in issues:
+        if fuzz.partial_ratio(filename, key) > 85:
+            case = "odd_header"
+    return case
+
+
+# The batch pipeline, from the lines of a file to its rows in the new header.
+def normalize(raw_data, date_mode, header, case):
+    col = staged("colify", colify, raw_data, case)
+    col = staged("simplify", simplify, header, col)
+    col = staged("general_parse", general_parse, col, header, date_mode)
+    col = staged("order", order, col, header)
+    return staged("rowify", rowify, col)
+
+
+# Assumes that simplify has been run before this function. In other words, each column exists within the final header.
+def order(col, header):
+    ordered_data = []
+    # Cycles through each header
+    for header_index in range(len(header)):
+        col_index = 0
+        # Cycles through each column, while checking to see if the column header is equal to the header above.
+        # If a match is found, the while loop is broken, and the code continues on.
+        while col_index < len(col) and not col[col_index][0] == header[header_index]:
+            col_index += 1
+        ordered_data.append(col[col_index])
+    if len(col) < len(header):
+        raise ValueError
+    return ordered_data
+
+
+# File recognition program. This automates the process of inputting the headers. Because there are only a set amount
+# of header formats, I can map the known formats to a hash map, with the keys being the source file header type, and
+# the output being the target output format.
+# The hash map is compiled once per case by compile_headers, and each header string is only ever matched once.
+def file_recognition(unit, case, mode="rewrite"):
+    if case not in header_matchers:
+        header_matchers[case] = compile_headers(case)
+
+    unit = unit.replace('_', ' ')
+    key = header_matchers[case](unit.lower())
+    if key is not None:
+        return key
+    # program would never run out here if the unit was located in the hash map.
+
+    if mode == "rewrite":
+        return unit
+    else:
+        return False
+
+
+# Compiled header matchers, one for each case.
+header_matchers = {}
+
+
+# The header cache, which maps the fingerprint of a raw header row to the header it was rewritten into and the line it
+# was found on. Only kept when the result cache is on, in headers.json in the Cache folder, and thrown out whenever the
+# alias tables change.
+known_headers = {}
+headers_path = None
+
+
+def header_fingerprint(cells, case):
+    if cells is None:
+        return None
+    return hashlib.sha1(repr((case, [str(cell) for cell in cells])).encode()).hexdigest()
+
+
+def headers_version():
+    return hashlib.sha1(repr((header_table(None), header_table("odd_header"))).encode()).hexdigest()
+
+
+# The lines headers have been found on, in the order they are worth looking at.
+def header_hints(case):
+    return sorted(set(known['line'] for known in known_headers.values() if known['case'] == case))
+
+
+# Loads the header cache from the Cache folder, once per process.
+def load_headers(cache_pathway):
+    global headers_path
+    if headers_path is not None:
+        return
+    headers_path = os.path.join(cache_pathway, "headers.json")
+    known_headers.update(saved_headers())
+
+
+# The headers in the cache on disk, if there are any that are still good.
+def saved_headers():
+    try:
+        with open(headers_path) as f:
+            saved = json.load(f)
+        if saved['version'] == headers_version():
+            return saved['headers']
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+
+# Adds a header to the cache, but only if its mapping can be trusted: every cell taken to be a target column is spelled
+# exactly like one of its aliases, rather than fuzzy matched, at least half of the cells are target columns, and no two
+# of them are the same one. Anything less is worked out again next time.
+def remember_header(fingerprint, raw, heading, case, line):
+    if headers_path is None or fingerprint is None or fingerprint in known_headers:
+        return
+    table = header_table(case)
+    aliases = set(alias.lower() for key in table for alias in table[key])
+    keys = [key for key in heading if key in table]
+    if len(keys) != len(set(keys)) or len(keys) < len(heading) / 2:
+        return
+    for i in range(len(heading)):
+        if heading[i] in table and str(raw[i]).replace('_', ' ').lower() not in aliases:
+            return
+
+    # Other workers may be adding headers to the same cache at the same time, so they take turns through a lock file,
+    # keep what the others have saved, and each write their own temporary file. One that can't get the lock doesn't
+    # save, as a header that isn't saved is only worked out again next time.
+    known_headers[fingerprint] = {'heading': list(heading), 'line': line, 'case': case}
+    lock = headers_path + ".lock"
+    if not take_lock(lock):
+        return
+    temporary = "%s.%d.tmp" % (headers_path, os.getpid())
+    try:
+        for key, known in saved_headers().items():
+            known_headers.setdefault(key, known)
+        with open(temporary, 'w') as f:
+            json.dump({'version': headers_version(), 'headers': known_headers}, f)
+        os.replace(temporary, headers_path)
+    except OSError:
+        pass
+    finally:
+        try:
+            os.remove(lock)
+        except OSError:
+            pass
+
+
+# Makes the lock file, waiting up to wait seconds for whoever has it. A lock older than stale seconds was left by a
+# process that died holding it, and is broken. Returns whether the lock was taken.
+def take_lock(lock, wait=5, stale=30):
+    deadline = time.time() + wait
+    while True:
+        try:
+            os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            return True
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock) > stale:
+                    os.remove(lock)
+                    continue
+            except OSError:
+                pass
+        except OSError:
+            return False
+        if time.time() > deadline:
+            return False
+        time.sleep(0.01)
+
+
+# Builds the matcher for a case. Every alias is resolved ahead of time, so that a header spelled exactly like one of
+# them is a single dictionary lookup. Anything else is only fuzzy matched against the aliases whose lengths are close
+# enough to reach the benchmark, since the ratio can never be higher than 2 * shorter / (both lengths). The answers
+# are memoized, as the same few dozen headers come up in every file. A hash map of aliases can be given instead of the
+# one for the case.
+def compile_headers(case, benchmark=93, header_hash=None):
+    if header_hash is None:
+        header_hash = header_table(case)
+
+    aliases = []
+    for key in header_hash:
+        for alias in header_hash[key]:
+            aliases.append((len(aliases), alias.lower(), key))
+
+    lengths = {}
+    for entry in aliases:
+        lengths.setdefault(len(entry[1]), []).append(entry)
+
+    # Candidates stay in hash map order, so the first key with a matching alias wins, like it always has.
+    def search(text):
+        candidates = []
+        for length in lengths:
+            if 200 * min(len(text), length) >= (benchmark - 0.5) * (len(text) + length):
+                candidates.extend(lengths[length])
+        candidates.sort()
+        for position, alias, key in candidates:
+            if fuzzy(text, alias, benchmark):
+                return key
+        return None
+
+    exact = {}
+    for position, alias, key in aliases:
+        if alias not in exact:
+            exact[alias] = search(alias)
+
+    @functools.lru_cache(maxsize=4096)
+    def match(text):
+        if text in exact:
+            return exact[text]
+        return search(text)
+    match.exact = exact
+    return match
+
+
+# The aliases each target header goes by in the source files, for a case.
+def header_table(case):
+    header_hash = {'Supplier Name': ['Vendor Name', 'Name1', 'Name', 'Vname', 'Vendor', 'Vendor Vname'],
+                   'Supplier Number': ['Vendor Id', 'Vendor ID', 'Vendor Number', 'Duns no', 'Vendor number',
+                                       'Vendor #', 'Vend no'],
+                   'Reference': ['Invoice Id', 'AP Invoice Number', 'Invoice', 'Doc Number', 'Credit Memo',
+                                 'Reference Number', 'Invoice #', 'Inv no', 'Vendor Credit memo/reference',
+                                 'Credit Memo Number', 'Invoice num', 'Invoice Number', 'Invoice/Reference'],
+                   'Amount': ['Gross Amount', 'Gross Amt', 'TranInvAmt', 'cost amt', 'Invoice Amt',
+                              'Invoice Amount', 'Amount', 'Amt', 'Inv Amt', 'Credit memo Amount',
+                              'Invoice Amount SUM', 'Base Inv Amt'],
+                   'Currency': ['Currency', 'Curr', 'Inv Currency', 'InvCurrency', 'Currency USD',
+                                'Invoice Currency Code', 'Txn Currency Cd'],
+                   'Invoice Date': ['AP Invoice Date', 'Invoice Date', 'doc date', 'Invoice Dte', 'Document Date',
+                                    'CreditMemo Date', 'Credit Memo Date', 'Invoice Dt', "InvoiceDte", 'Inv date'],
+                   'Payment Date': ['AP Check Date', 'Payment Date', 'pay due date', 'AP Payment Due Date',
+                                    'Clear Date', 'Clearing date', 'Date Processed', 'Clearing Date', 'PaymentDate',
+                                    'Check date', 'Pymt Date', 'Accounting Dt'],
+                   'Entered Date': ['Date added', 'Post Date', 'Entered Date', 'Posting Date', 'Posting Date',
+                                    'Create Date', 'ReconDate', 'entry date', 'Create Dt', 'Payment Entry Date',
+                                    'Entered Date', 'Clearing Date']}
+    if case == "odd_header":
+        header_hash['Supplier Name'] = ['Vendor Name']
+        header_hash['Supplier Number'] = ['Vendor']
+    return header_hash
+
+
+# Mode determines if the file_recognition function will output a boolean showing success or failure, or if it will
+# output a new header.
+
+def fuzzy(text, aux, benchmark=93):
+    if profile is not None:
+        count('fuzzy calls')
+    text = text.lower()
+    aux = aux.lower()
+    r = (fuzz.ratio(text, aux))
+    if r >= benchmark:
+        return True
+    else:
+        return False
+
+
+# Moves the columns of data into a TXT file, in the dialect output has in it, delimited with '\t' if it has none. The
+# rows are handed to a RollingWriter, which splits them into parts as it goes.
+def convert(rows, save, pathway, header, output=None):
+    with open_sink(save, pathway, header, output) as writer:
+        writer.writerows(rows)
+        check_kept(writer.kept, quarantine)
+
+    print("Excelled")
+
+
+# Writes rows out to a file, split into numbered parts of so many rows, 125,000 unless output says otherwise, or about
+# so many bytes apiece. A header given up front is repeated at the top of every part, and counts toward the first
+# part's rows like it always has. The first part keeps the plain name until a second one is needed. With some slack,
+# the file is only split once it runs that fraction over the limit, and the overflow is held back until then.
+# Rows are written one at a time through a large buffer, so the rows are never copied however many parts there are.
+# If output names a compressor, each part is written straight through it, and the byte size counts the text before
+# it is compressed. With a Checkpoint in output, one is made every time a part is finished, and a file that is being
+# picked up carries on from the part its checkpoint was made at.
+class RollingWriter:
+    def __init__(self, save, pathway, delimiter, first=None, output=None, slack=0):
+        if output is None:
+            output = {}
+        self.now = datetime.date.today().strftime("%m.%d.%y")
+        self.save = save
+        self.pathway = pathway
+        self.delimiter = delimiter
+        self.first = first
+        self.limit = output.get('rows', 125000)
+        self.size = output.get('size')
+        self.slack = int(self.limit * slack)
+        self.compress = output.get('compress')
+        self.level = output.get('level')
+        self.parts = output.get('parts')
+        self.checkpoint = output.get('checkpoint')
+
+        self.n = 0
+        self.done = 0
+        if self.checkpoint is not None and self.checkpoint.saved is not None:
+            self.n = self.checkpoint.saved['part']
+            self.now = self.checkpoint.saved['now']
+            self.done = self.checkpoint.saved['rows']
+        # How many rows have been written in all, the header aside.
+        self.kept = self.done
+        self.held = []
+        self.open_part()
+
+    def name(self, n):
+        return "%s/%s (%s)%s" % (self.pathway, self.save, self.now, self.suffix(n))
+
+    def suffix(self, n):
+        suffix = "%s.txt" % (n or '')
+        if self.compress is not None:
+            suffix += compressors[self.compress][0]
+        return suffix
+
+    def open_part(self):
+        # A part left from an earlier run may be hard-linked into the cache, so it is unlinked and written anew, rather
+        # than overwritten in place, which would change the cached copy too.
+        try:
+            os.remove(self.name(self.n))
+        except FileNotFoundError:
+            pass
+        if self.compress is None:
+            self.file = open(self.name(self.n), 'w', newline='', buffering=1024 * 1024)
+        else:
+            raw = compressed(self.name(self.n), self.compress, self.level)
+            self.file = io.TextIOWrapper(io.BufferedWriter(raw, 1024 * 1024), newline='')
+        self.writer = csv.writer(self.file, delimiter=self.delimiter)
+        self.rows = 0
+        self.written = 0
+        if self.first is not None:
+            self.written += self.writer.writerow(self.first)
+            if self.n == 0:
+                self.rows = 1
+
+    def rotate(self):
+        self.file.close()
+        self.done += self.rows - (1 if self.n == 0 and self.first is not None else 0)
+        if self.n == 0:
+            self.n = 1
+            os.replace(self.name(''), self.name(1))
+        if self.checkpoint is not None:
+            sync(self.name(self.n))
+            self.checkpoint.commit(self.n + 1, self.now, self.done, [self.name(n) for n in range(1, self.n + 1)])
+        self.n += 1
+        self.open_part()
+
+    def full(self):
+        if self.rows >= self.limit:
+            return True
+        return self.size is not None and self.rows > 0 and self.written >= self.size
+
+    def writerow(self, row):
+        self.kept += 1
+        if self.held or (self.slack and self.n == 0 and self.rows >= self.limit):
+            self.held.append(row)
+            if len(self.held) > self.slack:
+                self.rotate()
+                for held in self.held:
+                    self.written += self.writer.writerow(held)
+                self.rows += len(self.held)
+                self.held = []
+            return
+        if self.full():
+            self.rotate()
+        self.written += self.writer.writerow(row)
+        self.rows += 1
+        if self.checkpoint is not None and self.full():
+            self.checkpoint.mark()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    # Whatever was held back fits in the first part after all.
+    def close(self):
+        for held in self.held:
+            self.writer.writerow(held)
+        self.held = []
+        self.file.close()
+        # Lets process know which files came out, for the result cache.
+        if self.parts is not None:
+            for n in (range(1, self.n + 1) if self.n else [0]):
+                self.parts.append((self.name(n), self.suffix(n)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Picks where the rows of one file go: a SQLiteWriter if output names a database, otherwise a RollingWriter that
+# writes in the dialect output has in it, with the header at the top of every part if the dialect is headed.
+def open_sink(save, pathway, header, output=None):
+    if output is None:
+        output = tabbed_dialect
+    if output.get('database'):
+        return SQLiteWriter(save, output)
+    first = header if output.get('headed') else None
+    return RollingWriter(save, pathway, output.get('delimiter', '\t'), first, output, output.get('slack', 0))
+
+
+# Loads the rows of one file into the SQLite table set up by prepare_database, tagged with the name of the file they
+# came from. Rows that were loaded from a file of the same name before are replaced. They go in with executemany, a
+# batch at a time, and the whole file is one transaction, which is only committed if every row made it in.
+class SQLiteWriter:
+    def __init__(self, save, output, batch=10000):
+        self.save = save
+        self.batch = batch
+        self.insert = output['insert']
+        # Other processes may be loading their own files, so wait for them rather than give up.
+        self.connection = sqlite3.connect(output['database'], timeout=600)
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.execute('DELETE FROM "%s" WHERE "Source File" = ?' % output['table'], (save,))
+        self.held = []
+        self.kept = 0
+
+    def writerow(self, row):
+        self.kept += 1
+        self.held.append([self.save] + list(row))
+        if len(self.held) >= self.batch:
+            self.flush()
+
+    def writerows(self, rows):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        self.connection.executemany(self.insert, self.held)
+        self.held = []
+
+    def close(self, commit=True):
+        try:
+            if commit:
+                self.flush()
+                self.connection.commit()
+            else:
+                self.connection.rollback()
+        finally:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, kind, value, traceback):
+        self.close(kind is None)
+
+
+# Sets up the SQLite database for a run. There is a table for every target header, named after a hash of its columns,
+# with a column for the name of the source file in front. The indexes are dropped for the load, since it is faster to
+# build them once at the end, in finish_database. Returns the output settings with the database filled in.
+def prepare_database(output, header, save_pathway):
+    output = dict(output)
+    output['database'] = os.path.join(save_pathway, output['sqlite'])
+    output['table'] = "normalized_%s" % hashlib.sha1('\t'.join(header).encode()).hexdigest()[:8]
+    columns = ["Source File"] + list(header)
+    output['insert'] = 'INSERT INTO "%s" VALUES (%s)' % (output['table'], ', '.join('?' * len(columns)))
+
+    connection = sqlite3.connect(output['database'], timeout=600)
+    try:
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute('CREATE TABLE IF NOT EXISTS "%s" (%s)' %
+                           (output['table'], ', '.join('"%s" TEXT' % column for column in columns)))
+        for column in indexed_columns:
+            connection.execute('DROP INDEX IF EXISTS "%s"' % index_name(output['table'], column))
+        connection.commit()
+    finally:
+        connection.close()
+    return output
+
+
+# The columns that are indexed after a load, when asked for.
+indexed_columns = ['Supplier Number', 'Reference']
+
+
+def index_name(table, column):
+    return "%s_%s" % (table, column.lower().replace(' ', '_'))
+
+
+# Builds the indexes once everything has been loaded, if output asks for them, and says where the rows went.
+def finish_database(output):
+    connection = sqlite3.connect(output['database'], timeout=600)
+    try:
+        if output.get('index'):
+            names = [row[1] for row in connection.execute('PRAGMA table_info("%s")' % output['table'])]
+            for column in indexed_columns:
+                if column in names:
+                    connection.execute('CREATE INDEX IF NOT EXISTS "%s" ON "%s" ("%s")' %
+                                       (index_name(output['table'], column), output['table'], column))
+            connection.commit()
+    finally:
+        connection.close()
+    print("Loaded into table %s of %s" % (output['table'], output['database']))
+
+
+# The version of the rules files are converted by, for the result cache, which keys them by the name of the converter
+# in output as well. Bump it along with any change to how rows are parsed or written that the alias tables and date
+# formats don't show.
+rules_version = 1
+
+
+# Hashes a source file together with the profile it is converted under: this converter and its rules, the alias tables
+# and date formats, the target header, the case, and the output settings that show up in the files. Anything that
+# changes the output changes the key, so stale results are never reused, and are left for evict_cached to clear out.
+def cache_key(name, header, case, output):
+    digest = hashlib.sha256()
+    digest.update(repr((output.get('program'), rules_version, header_table(case), date_titles, date_formats,
+                        list(header), case, [output.get(setting) for setting in ('rows', 'size', 'compress', 'level')]
+                        )).encode())
+    with open(name, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Puts the parts cached under a key into the target folder, under the name of the file being converted. They are hard
+# linked where the drive allows it, and copied otherwise. Returns whether there was anything cached to reuse.
+def reuse_cached(key, save, pathway, output):
+    entry = os.path.join(output['cache_pathway'], key)
+    now = datetime.date.today().strftime("%m.%d.%y")
+    try:
+        with open(os.path.join(entry, "parts.txt")) as f:
+            suffixes = f.read().splitlines()
+        for i in range(len(suffixes)):
+            target = "%s/%s (%s)%s" % (pathway, save, now, suffixes[i])
+            if os.path.exists(target):
+                os.remove(target)
+            try:
+                os.link(os.path.join(entry, str(i)), target)
+            except OSError:
+                shutil.copyfile(os.path.join(entry, str(i)), target)
+        # Marks the entry as just used, for evict_cached.
+        os.utime(entry)
+    except OSError:
+        return False
+    return True
+
+
+# Caches the parts that were just written for a file under its key. The list of parts goes in last, so an entry only
+# counts once it is complete.
+def store_cached(key, output):
+    entry = os.path.join(output['cache_pathway'], key)
+    if os.path.exists(os.path.join(entry, "parts.txt")):
+        return
+    if not os.path.isdir(entry):
+        os.mkdir(entry)
+    for i in range(len(output['parts'])):
+        target = os.path.join(entry, str(i))
+        if os.path.exists(target):
+            os.remove(target)
+        try:
+            os.link(output['parts'][i][0], target)
+        except OSError:
+            shutil.copyfile(output['parts'][i][0], target)
+    with open(os.path.join(entry, "parts.tmp"), 'w') as f:
+        f.write(''.join(suffix + '\n' for name, suffix in output['parts']))
+    os.replace(os.path.join(entry, "parts.tmp"), os.path.join(entry, "parts.txt"))
+    evict_cached(output)
+
+
+# Keeps the cache under its size limit, by throwing out the entries that were used the longest time ago.
+def evict_cached(output):
+    entries = []
+    total = 0
+    for key in os.listdir(output['cache_pathway']):
+        entry = os.path.join(output['cache_pathway'], key)
+        try:
+            size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            entries.append((os.path.getmtime(entry), size, entry))
+        except OSError:
+            continue
+        total += size
+    entries.sort()
+    while total > output['cache'] and entries:
+        used, size, entry = entries.pop(0)
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+
+
+# Empties the result cache.
+def clear_cache():
+    shutil.rmtree("%s/Desktop/Cache" % os.path.expanduser('~'), ignore_errors=True)
+
+
+# The compressors that output can be written through, with the extension each adds, the level used by default, and the
+# lowest level each takes. The highest is 9 for all of them.
+compressors = {'gzip': ('.gz', 6, 0), 'bz2': ('.bz2', 9, 1), 'xz': ('.xz', 6, 0)}
+
+
+# Opens a compressed file for writing, at the given level or the compressor's default one.
+def compressed(name, compress, level=None):
+    if level is None:
+        level = compressors[compress][1]
+    if compress == 'gzip':
+        return gzip.GzipFile(name, 'wb', compresslevel=level)
+    elif compress == 'bz2':
+        return bz2.BZ2File(name, 'wb', compresslevel=level)
+    return lzma.LZMAFile(name, 'wb', preset=level)
+
+
+# Creates a new path to store the created excel files in.
+def direct(new_folder):
+    home = os.path.expanduser('~')
+    pathway = "%s/Desktop/%s" % (home, new_folder)
+    # Another worker may be making the same folder at the same time.
+    os.makedirs(pathway, exist_ok=True)
+    return pathway
+
+
+def simplify(header, col):
+    new_data = []
+
+    for index in range(len(col)):
+        if col[index][0] in header:
+            new_data.append(col[index])
+    if len(new_data) == 0:
+        print("Simplification fail")
+        raise SyntaxError
+    return new_data
+
+
+def rowify(col):
+    new_row = []
+    for row_index in range(1, len(col[0])):
+        temp = []
+        for col_index in range(0, len(col)):
+            temp.append(col[col_index][row_index])
+        new_row.append(temp)
+    return new_row
+
+
+# Returns the columns of a TXT file, as a nested array. Automatically modifies the heading.
+def colify(data_array, case):
+    header_start, heading, confidence = locate_header(data_array, case)
+    heading = rewrite_header(heading, case, header_start)
+
+    # Nested array to hold the values outputted. Returned at the end of the function
+    new_data = create_nested_array(len(heading))
+    for i in range(0, len(heading)):
+        new_data[i].append(heading[i])
+
+    rows = range(header_start + 1, len(data_array))
+    if rows and isinstance(data_array[header_start], str):
+        # Text is split by a single csv reader, with the dialect worked out from the top of it like sniff does, so that
+        # quoted fields can run over several lines.
+        delimiter, quoting = sample_dialect(''.join(head_lines(data_array, 65536))[:65536])
+        reader = csv.reader((data_array[row] for row in rows), delimiter=delimiter, quoting=quoting)
+        cells = stream_cells(((header_start + 1 + reader.line_num, cells) for cells in reader), len(heading), tidy_row,
+                             padded=False)
+    else:
+        cells = stream_cells(((row + 1, data_array[row]) for row in rows), len(heading))
+    kept = []
+    for line, checkout in cells:
+        kept.append(line)
+        for i in range(0, len(checkout)):
+            new_data[i].append(checkout[i])
+    if quarantine is not None:
+        quarantine.lines = kept
+        quarantine.columns = list(new_data)
+    return new_data
+
+
+# The lines at the top of a file, up to the first that reaches so many characters in all.
+def head_lines(lines, size):
+    length = 0
+    for line in lines:
+        yield line
+        length += len(line)
+        if length >= size:
+            break
+
+
+# How many lines from the top of a file the header is looked for in.
+header_lookahead = 50
+
+
+# Finds the header in the first few lines of a file. Each line is split once and scored by score_header, and the best
+# one wins, the first of them on a tie. A line whose header is in the header cache wins outright, and the lines that
+# headers seen before were on are looked at first, since each vendor lays out its files the same way every time.
+# Returns the line the header is on, its cells and how confident the pick is, as the fraction of its cells that are
+# known headers. Raises a ValueError saying why, if none of the lines has a single known header in it.
+def locate_header(lines, case=None, lookahead=header_lookahead):
+    lines = lines[:lookahead]
+    cells = [None] * len(lines)
+
+    def split(line):
+        if cells[line] is None:
+            cells[line] = get_row(lines[line], "override")
+        return cells[line]
+
+    for hint in header_hints(case):
+        if hint < len(lines):
+            known = known_headers.get(header_fingerprint(split(hint), case))
+            if known is not None and known['line'] == hint:
+                return header_found(hint, cells[hint], 1.0)
+
+    best = None
+    for line in range(len(lines)):
+        if header_fingerprint(split(line), case) in known_headers:
+            return header_found(line, cells[line], 1.0)
+        if plain_header(cells[line], case):
+            return header_found(line, cells[line], 1.0)
+        # A row with fewer cells that could be headers than the best row has target columns can't beat it.
+        if best is not None and sum(1 for cell in cells[line] if could_be_header(cell)) < best[0][0]:
+            continue
+        score = score_header(cells[line], case)
+        if best is None or score > best[0]:
+            best = (score, line)
+
+    if best is None:
+        reason = "the file is empty"
+    elif best[0][0] == 0:
+        reason = "none of the first %d lines has a known header in it" % len(lines)
+    else:
+        return header_found(best[1], cells[best[1]], best[0][1])
+    print("No header found, %s." % reason)
+    raise ValueError(reason)
+
+
+# Scores a row as a header: how many different target columns its cells are known headers for, then what fraction of
+# the cells that aren't blank are known headers. Only the cells that could be headers are fuzzy matched.
+def score_header(cells, case):
+    keys = set()
+    filled = 0
+    known = 0
+    for cell in cells:
+        if cell == '' or cell is None:
+            continue
+        filled += 1
+        if could_be_header(cell):
+            key = file_recognition(cell, case, "bool")
+            if key:
+                keys.add(key)
+                known += 1
+    return len(keys), known / filled if filled else 0.0
+
+
+# Whether a cell could be a header at all. Cells that aren't text, like the numbers in an Excel sheet, never are, and
+# neither is text with no more letters in it than digits, like the numbers, dates and IDs in a text file.
+def could_be_header(cell):
+    if not isinstance(cell, str):
+        return False
+    digits = letters = 0
+    for character in cell:
+        if character.isdigit():
+            digits += 1
+        elif character.isalpha():
+            letters += 1
+    return letters > digits
+
+
+# Whether a row can be taken for the header without looking any further: every cell in it that isn't blank is spelled
+# exactly like one of the aliases, and between them they name at least half of the target columns. It only takes a
+# dictionary lookup a cell, so a file whose header is spelled out plainly is never fuzzy matched at all.
+def plain_header(cells, case):
+    if case not in header_matchers:
+        header_matchers[case] = compile_headers(case)
+    exact = header_matchers[case].exact
+    keys = set()
+    for cell in cells:
+        if cell == '' or cell is None:
+            continue
+        if not isinstance(cell, str):
+            return False
+        key = exact.get(cell.replace('_', ' ').lower())
+        if key is None:
+            return False
+        keys.add(key)
+    return len(keys) * 2 >= len(header_table(case))
+
+
+def header_found(line, cells, confidence):
+    if profile is not None:
+        profile['header'] = {'line': line, 'confidence': confidence}
+    return line, cells, confidence
+
+
+# Creates a nested array
+def create_nested_array(size):
+    array = [None] * size
+    for x in range(0, size):
+        array[x] = []
+    return array
+
+
+# Finds all files within a folder. Argument takes a directory path.
+def seek(path):
+    files = os.listdir(path)
+    return files
+
+
+# Reads the TXT file in its entirety. Not really formatted well, outputs as a list. Text files are memory mapped
+# rather than read in, and only decoded a line at a time as colify asks for them, so Excel files are told apart by
+# their signature instead of by failing to decode.
+def read_txt_file(name):
+    date_mode = 3
+    with open(name, 'rb') as f:
+        signature = f.read(4)
+    if signature not in (b'\xd0\xcf\x11\xe0', b'PK\x03\x04'):
+        if os.path.getsize(name) > 0:
+            data = MappedLines(name)
+        else:
+            data = []
+    else:
+        # Excel file parsing.
+        rows, date_mode = stream_excel(name, signature)
+        data = list(rows)
+    return data, date_mode
+
+
+# The lines of a text file, read through a memory map. All that is kept is where each line starts, in a compact array
+# built in one scan of the file, and a line is only decoded when it is asked for. Behaves like the list that
+# readlines would give, with the lines split at '\r\n', '\r' or '\n' and ending in '\n', the way a file opened as
+# text splits them, so that the files Macs save with only '\r' between the lines are read the same.
+class MappedLines:
+    def __init__(self, name):
+        self.encoding = locale.getpreferredencoding(False)
+        with open(name, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.offsets = array.array('q', [0])
+        for match in line_break.finditer(self.map):
+            self.offsets.append(match.end())
+        if self.offsets[-1] != len(self.map):
+            self.offsets.append(len(self.map))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError
+        line = self.map[self.offsets[index]:self.offsets[index + 1]].decode(self.encoding, 'surrogateescape')
+        if line.endswith('\r\n'):
+            return line[:-2] + '\n'
+        if line.endswith('\r'):
+            return line[:-1] + '\n'
+        return line
+
+    def close(self):
+        self.map.close()
+
+
+line_break = re.compile(b'\r\n?|\n')
+
+
+# Lets go of the memory map of a source file as soon as its lines have been read, rather than whenever it is garbage
+# collected, since Windows won't delete a file that is still mapped.
+def unmap(data):
+    if isinstance(data, MappedLines):
+        data.close()
+
+
+# Gets the row of each TXT file. Takes the content of txt files as an input, as an array.
+def get_row(data, expected=None):
+    newstring = data
+    try:
+        # Removes the random spacing characters
+        if newstring.count('\t') > newstring.count(','):
+            newstring = (data.split('\t'))
+        else:
+            temp = [data]
+            for line in csv.reader(temp):
+                newstring = line
+
+        newstring[len(newstring) - 1] = (newstring[len(newstring) - 1]).replace('\n', '')
+        counter = 0
+        for i in range(0, len(newstring)):
+            newstring[i] = newstring[i].strip(' ')
+            newstring[i] = newstring[i].replace('"', "")
+            if newstring[i] == '':
+                counter += 1
+    except:
+        counter = 0
+        for i in range(0, len(newstring)):
+            try:
+                newstring[i] = newstring[i].strip('"')
+                newstring[i] = newstring[i].strip(' ')
+            except:
+                pass
+            if newstring[i] == '':
+                counter += 1
+
+    if counter > 3 * len(newstring) / 4 and expected != "override":
+        return None
+    else:
+        return newstring
+
+
+# Tidies up a row that the csv module has already split, the same way get_row does. Blank lines come through as None.
+def tidy_row(cells, expected=None):
+    counter = 0
+    for i in range(0, len(cells)):
+        cells[i] = cells[i].strip(' ').replace('"', "")
+        if cells[i] == '':
+            counter += 1
+
+    if (not cells or counter > 3 * len(cells) / 4) and expected != "override":
+        return None
+    else:
+        return cells
+
+
+# Re-formats data as needed. Dates, Empty Columns, Currency, and leading and trailing zeros/spaces are cut out in this
+# method.
+def general_parse(column, header, date_mode):
+    col = column
+
+    # Creates an array containing the headers of the data being parsed.
+    first = []
+    for z in range(len(col)):
+        first.append(col[z][0])
+
+    # Checkpoint. If there isn't a supplier number inside of the data set, the file is automatically moved to the
+    # problem stack. Otherwise, if a required header is not found inside of the data set, a blank column is appended
+    # in its place so that the data can pass the next few checkpoints.
+    for q in range(len(header)):
+        if header[q] not in first:
+            if header[q] == 'Supplier Number':
+                print("Issue with the headers. Program did not find a Vendor ID.")
+                raise ValueError
+            temp = [""] * len(col[0])
+            temp[0] = header[q]
+            if q != len(col) - 1:
+                col.insert(q, temp)
+            else:
+                col.append(temp)
+
+    # Each date column gets its own parser, fitted to a sample of the column.
+    parsers = {}
+    for index in range(0, len(col)):
+        if col[index][0] in date_titles and col[index][0] not in parsers:
+            formats = date_order(itertools.islice(col[index], 1, None), col[index][0])
+            parsers[col[index][0]] = date_parser(formats, date_mode)
+
+    # Data formatting. The for loops loop through the columns in question and process every single value in the columns.
+    # A row with a value that can't be formatted is set aside once all of the columns are done, with the cells colify
+    # read, so the columns are formatted into copies rather than in place.
+    faults = {}
+    raw = list(col)
+    if quarantine is not None and quarantine.columns:
+        raw, quarantine.columns = quarantine.columns, []
+    for index in range(0, len(col)):
+        if col[index][0] in ('Invoice Date', 'Payment Date', 'Entered Date', 'Currency', 'Supplier Number',
+                             'Reference'):
+            # Runs through all of the values under the header, which is left as it is.
+            col[index] = list(col[index])
+            for i in range(1, len(col[index])):
+                try:
+                    col[index][i] = parse_cell(col[index][i], col[index][0], parsers)
+                except Exception as error:
+                    faults.setdefault(i, format_fault(col[index][0], error))
+
+    if faults:
+        for i in sorted(faults):
+            line = quarantine.lines[i - 1] if quarantine is not None and quarantine.lines else i
+            set_aside(line, faults[i], [column[i] for column in raw])
+        for index in range(0, len(col)):
+            col[index] = [col[index][i] for i in range(len(col[index])) if i not in faults]
+    return col
+
+
+def format_fault(title, error):
+    return "a value under %s that could not be formatted, %s: %s" % (title, type(error).__name__, error)
+
+
+# The columns that hold dates.
+date_titles = ('Invoice Date', 'Payment Date', 'Entered Date')
+
+
+# Formats a single value, according to the column it sits under. Dates go through the parser made for their column.
+def parse_cell(value, title, parsers):
+    if title in date_titles:
+        value = parsers[title](value)
+        if value == '0' or value == 0:
+            value = 'NULL'
+    elif title == 'Currency':
+        if str(value).isspace() or not value:
+            value = "USD"
+    elif title == 'Supplier Number' or title == 'Reference':
+        if type(value) == float:
+            value = format_id(value)
+    return value
+
+
+# Formats a supplier number or reference that came out of Excel as a float. Whole numbers are written without the .0,
+# and anything else the way it is, so that 10.05 stays 10.05.
+def format_id(value):
+    if value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+# The streaming pipeline. Does the same work as read_txt_file, colify, general_parse, order, rowify and convert, but
+# with generators, so that each row goes from the source file to the target file before the next one is read. The
+# memory used stays flat no matter how large the file is.
+def stream(name, save, header, case, pathway, output=None):
+    checkpoint = None if output is None else output.get('checkpoint')
+    if checkpoint is not None and checkpoint.saved is not None:
+        # Picks up from the checkpoint, with the header and dialect it was read with.
+        rows = stream_cells(stream_records(name, checkpoint.dialect, checkpoint), len(checkpoint.heading), tidy_row,
+                            padded=False)
+        heading, date_mode = checkpoint.heading, 3
+    else:
+        heading, rows, date_mode = staged("stream_source", stream_source, name, case, checkpoint)
+    rows = stream_parse(heading, metered("read", rows), header, date_mode, checkpoint)
+    rows = (row for line, row in rows) if checkpoint is None else checkpoint.follow(rows)
+    staged("stream_convert", stream_convert, metered("stream_parse", rows), save, pathway, header, output)
+
+
+# Opens a file for the streaming pipeline. Returns its rewritten header, a generator over the rows beneath it and its
+# date mode. Text files are read with the dialect sniffed from the top of them, by a single csv reader over the whole
+# file, so that quoted fields can even run over several lines. Anything that can't be sniffed is read line by line.
+# With a checkpoint, the dialect and header are kept in it.
+def stream_source(name, case, checkpoint=None):
+    dialect = sniff(name, case)
+    if dialect is None:
+        raw_data, date_mode = stream_txt_file(name)
+        heading, rows = stream_colify(raw_data, case)
+        return heading, rows, date_mode
+
+    records = stream_records(name, dialect, checkpoint)
+    heading = rewrite_header(tidy_row(next(records)[1]), case, dialect[2])
+    if checkpoint is not None:
+        checkpoint.dialect = list(dialect)
+        checkpoint.heading = heading
+    return heading, stream_cells(records, len(heading), tidy_row, padded=False), 3
+
+
+# Works out how a text file is laid out from its first few lines, so that it only has to be done once per file: the
+# delimiter, picked the same way get_row picks it for a line, whether any fields are quoted, and the line the header
+# is on. Returns None for Excel files, and for files whose header isn't in the sample.
+def sniff(name, case=None, size=65536):
+    with open(name, 'rb') as f:
+        signature = f.read(4)
+    if signature in (b'\xd0\xcf\x11\xe0', b'PK\x03\x04'):
+        return None
+    with open(name, 'r', errors='surrogateescape') as f:
+        sample = f.read(size)
+
+    lines = sample.split('\n')
+    if len(sample) == size:
+        # The last line was cut off.
+        lines.pop()
+    try:
+        header_line = locate_header([line + '\n' for line in lines[:header_lookahead]], case)[0]
+    except ValueError:
+        return None
+    return sample_dialect(sample) + (header_line,)
+
+
+# The delimiter and quoting of a text file, from a sample of the top of it.
+def sample_dialect(sample):
+    if sample.count('\t') > sample.count(','):
+        delimiter = '\t'
+    else:
+        delimiter = ','
+    if re.search('(^|%s) *"' % delimiter, sample, re.MULTILINE):
+        quoting = csv.QUOTE_MINIMAL
+    else:
+        quoting = csv.QUOTE_NONE
+    return delimiter, quoting
+
+
+# Splits a text file into rows with its sniffed dialect, starting from the header. Each comes with the line it ends on.
+def stream_records(name, dialect, checkpoint=None):
+    delimiter, quoting, header_line = dialect
+    if checkpoint is not None:
+        for record in checkpointed_records(name, dialect, checkpoint):
+            yield record
+        return
+    with open(name, 'r', newline='', errors='surrogateescape') as f:
+        reader = csv.reader(f, delimiter=delimiter, quoting=quoting)
+        for cells in reader:
+            if reader.line_num > header_line:
+                yield reader.line_num, cells
+
+
+# stream_records for a file with a checkpoint, which keeps it up to date with how far into the file each row ends, and
+# starts from where the checkpoint left off, if it is being picked up. The lines are encoded again to count their
+# bytes, since a text file can't say where it is at while it is being read.
+def checkpointed_records(name, dialect, checkpoint):
+    delimiter, quoting, header_line = dialect
+    encoding = locale.getpreferredencoding(False)
+    line, offset = 0, 0
+    if checkpoint.saved is not None:
+        line, offset = checkpoint.saved['line'], checkpoint.saved['offset']
+
+    with open(name, 'rb') as f:
+        f.seek(offset)
+        text = io.TextIOWrapper(f, encoding=encoding, errors='surrogateescape', newline='')
+
+        def lines():
+            nonlocal offset
+            for text_line in text:
+                offset += len(text_line.encode(encoding, 'surrogateescape'))
+                yield text_line
+
+        reader = csv.reader(lines(), delimiter=delimiter, quoting=quoting)
+        for cells in reader:
+            checkpoint.read = (line + reader.line_num, offset)
+            if line + reader.line_num > header_line:
+                yield line + reader.line_num, cells
+
+
+# Streaming counterpart of read_txt_file. Excel files are told apart by their signature, since a text file can't be
+# known to be undecodable until it has been read through.
+def stream_txt_file(name):
+    with open(name, 'rb') as f:
+        signature = f.read(4)
+    if signature in (b'\xd0\xcf\x11\xe0', b'PK\x03\x04'):
+        return stream_excel(name, signature)
+    return stream_lines(name), 3
+
+
+def stream_lines(name):
+    with open(name, 'r', errors='surrogateescape') as f:
+        for line in f:
+            yield line
+
+
+# Opens an Excel file, and returns a generator over the rows of its visible sheets along with its date mode. Older
+# workbooks are opened on demand by xlrd, so only one sheet is loaded at a time, and .xlsx workbooks are read straight
+# from their XML.
+def stream_excel(name, signature):
+    if signature == b'PK\x03\x04':
+        return stream_xlsx(name)
+    book = xlrd.open_workbook(name, on_demand=True)
+    return stream_sheets(book), book.datemode
+
+
+# Yields the rows of every visible sheet of the workbook, in order. Each sheet is let go of once it has been read, and
+# the hidden ones are never loaded at all.
+def stream_sheets(book):
+    # Eliminates ghost headers, but assumes that the ghost headers are hidden under maximum security, and that
+    # they are the first one in the sheet series.
+    first = 0
+    for wsnum in range(0, book.nsheets):
+        if book._sheet_visibility[wsnum] == 0:
+            ws = book.sheet_by_index(wsnum)
+            if wsnum == first:
+                start = 0
+            else:
+                # Possible issue that happens if the header has multiple rows
+                start = 1
+            for rows in range(start, ws.nrows):
+                yield strip_quotes(ws.row_values(rows))
+            book.unload_sheet(wsnum)
+        else:
+            first += 1
+    book.release_resources()
+
+
+def strip_quotes(temp):
+    try:
+        for x in range(len(temp)):
+            temp[x] = temp[x].strip('"')
+    except AttributeError:
+        pass
+    return temp
+
+
+# Streaming reader for .xlsx workbooks. Each sheet's XML is walked with iterparse, and every row is thrown away as
+# soon as it has been yielded, so a sheet is never held whole. Cells come through the way xlrd gives them: numbers as
+# floats, booleans as 0 or 1, text as text and empty cells as ''. Rows are padded out to the sheet's dimension.
+def stream_xlsx(name):
+    archive = zipfile.ZipFile(name)
+    main = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+    relationships = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    date_mode = 0
+    for properties in workbook.iter(main + 'workbookPr'):
+        if properties.get('date1904') in ('1', 'true'):
+            date_mode = 1
+
+    targets = {}
+    for rel in ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels')):
+        target = rel.get('Target')
+        targets[rel.get('Id')] = target[1:] if target.startswith('/') else 'xl/' + target
+    sheets = [(sheet.get('state', 'visible'), targets[sheet.get(relationships + 'id')])
+              for sheet in workbook.iter(main + 'sheet')]
+
+    shared = []
+    if 'xl/sharedStrings.xml' in archive.namelist():
+        for event, item in ElementTree.iterparse(archive.open('xl/sharedStrings.xml')):
+            if item.tag == main + 'si':
+                # Plain strings have a single t, rich ones a t in each run.
+                text = item.find(main + 't')
+                if text is not None:
+                    shared.append(text.text or '')
+                else:
+                    shared.append(''.join(run.text or '' for run in item.findall(main + 'r/' + main + 't')))
+                item.clear()
+
+    def rows():
+        first = 0
+        for wsnum in range(len(sheets)):
+            if sheets[wsnum][0] != 'visible':
+                first += 1
+                continue
+            width = 0
+            sheet_data = None
+            rowx = -1
+            for event, item in ElementTree.iterparse(archive.open(sheets[wsnum][1]), events=('start', 'end')):
+                if event == 'start':
+                    if item.tag == main + 'sheetData':
+                        sheet_data = item
+                    continue
+                if item.tag == main + 'dimension':
+                    width = column_index(item.get('ref').split(':')[-1]) + 1
+                elif item.tag == main + 'row':
+                    rowx = int(item.get('r')) - 1 if item.get('r') else rowx + 1
+                    temp = []
+                    for cell in item.iter(main + 'c'):
+                        colx = column_index(cell.get('r')) if cell.get('r') else len(temp)
+                        temp.extend([''] * (colx - len(temp)))
+                        temp.append(cell_value(cell, shared, main))
+                    while temp and temp[-1] == '':
+                        temp.pop()
+                    temp.extend([''] * (width - len(temp)))
+                    if rowx > 0 or wsnum == first:
+                        yield strip_quotes(temp)
+                    sheet_data.clear()
+        archive.close()
+    return rows(), date_mode
+
+
+# Turns a cell reference like 'AB12' into the index of its column.
+def column_index(reference):
+    colx = 0
+    for letter in reference:
+        if not letter.isalpha():
+            break
+        colx = colx * 26 + ord(letter.upper()) - ord('A') + 1
+    return colx - 1
+
+
+def cell_value(cell, shared, main):
+    kind = cell.get('t', 'n')
+    if kind == 'inlineStr':
+        return ''.join(text.text or '' for text in cell.iter(main + 't'))
+    value = cell.find(main + 'v')
+    if value is None or value.text is None:
+        return ''
+    if kind == 's':
+        return shared[int(value.text)]
+    if kind == 'n':
+        return float(value.text)
+    if kind == 'b':
+        return int(value.text)
+    return value.text
+
+
+# Streaming counterpart of colify. Looks for the header in the first few lines with locate_header, then returns the
+# rewritten header along with a generator over the rows beneath it, split by stream_cells.
+def stream_colify(raw_data, case):
+    raw_data = iter(raw_data)
+    lines = list(itertools.islice(raw_data, header_lookahead))
+    header_line, heading, confidence = locate_header(lines, case)
+
+    heading = rewrite_header(heading, case, header_line)
+    return heading, stream_cells(enumerate(itertools.chain(lines[header_line + 1:], raw_data), header_line + 2),
+                                 len(heading))
+
+
+# Rewrites the cells of a header row into the target header. A header in the header cache is taken from there as is,
+# and a new one is offered to it, along with the line it was on.
+def rewrite_header(heading, case, line=0):
+    fingerprint = header_fingerprint(heading, case)
+    if fingerprint in known_headers:
+        return list(known_headers[fingerprint]['heading'])
+    raw = list(heading)
+    for header_index in range(len(heading)):
+        heading[header_index] = file_recognition(heading[header_index], case)
+    remember_header(fingerprint, raw, heading, case, line)
+    return heading
+
+
+# Splits each line into its cells, dropping the empty ones. Lines that are already split are tidied up with tidy_row
+# instead. The lines come numbered, and each row goes along with the number of its line. Rows that are faulty are
+# handed to aside with the reason, and left out. A row short of the width of the header is only padded out if padded
+# says so, which it does by default for rows that come as cells, like the ones of a sheet, whose empty cells at the
+# end are left off. A short line of text is a record that was broken up, and a fault.
+def stream_cells(numbered, width, split=get_row, aside=set_aside, padded=None):
+    for line, raw in numbered:
+        checkout = split(raw)
+        if checkout is not None:
+            pad = not isinstance(raw, str) if padded is None else padded
+            fault = row_fault(raw, checkout, width, pad)
+            if fault is not None:
+                if aside is not None:
+                    aside(line, fault, checkout)
+                continue
+            yield line, checkout + [""] * (width - len(checkout))
+
+
+# Matches what text files are decoded into where they have bytes that aren't in the encoding, so that one bad line
+# can be set aside instead of failing the whole file.
+undecodable = re.compile('[\udc80-\udcff]')
+
+
+# Returns why a row that has just been split into its cells can't be converted, or None if it can.
+def row_fault(raw, cells, width, pad=False):
+    if len(cells) > width or len(cells) < width and not pad:
+        return "%d cells, where the header has %d" % (len(cells), width)
+    try:
+        text = raw if isinstance(raw, str) else ''.join(cells)
+    except TypeError:
+        # Cells from Excel, which were never decoded.
+        return None
+    if undecodable.search(text):
+        return "bytes that can't be read as %s" % locale.getpreferredencoding(False)
+    return None
+
+
+# Streaming counterpart of simplify, general_parse and order. The header checks are done up front, then each row is
+# re-ordered into the new header and formatted as it passes through. Missing columns come through blank. The rows stay
+# numbered. With a checkpoint, the date formats are kept in it, or taken from it when it is being picked up.
+def stream_parse(heading, rows, header, date_mode, checkpoint=None):
+    positions = check_heading(heading, header)
+
+    # The first rows are held back to fit the date parsers to.
+    held = []
+    if checkpoint is not None and checkpoint.formats is not None:
+        formats = checkpoint.formats
+    else:
+        held = list(itertools.islice(rows, 100))
+        formats = date_orders([row for line, row in held], positions, header)
+        if checkpoint is not None:
+            checkpoint.formats = formats
+    parsers = {}
+    for title in formats:
+        parsers[title] = date_parser(formats[title], date_mode)
+    return order_rows(itertools.chain(held, rows), positions, header, parsers)
+
+
+# Does the checks of simplify and general_parse on the header, and returns where each column of the new header is
+# found in it, or None for the ones that are missing.
+def check_heading(heading, header):
+    if not [title for title in heading if title in header]:
+        print("Simplification fail")
+        raise SyntaxError
+    if 'Supplier Number' in header and 'Supplier Number' not in heading:
+        print("Issue with the headers. Program did not find a Vendor ID.")
+        raise ValueError
+    return [heading.index(title) if title in heading else None for title in header]
+
+
+# Picks the date formats for each date column of the new header, from the first few rows.
+def date_orders(rows, positions, header):
+    formats = {}
+    for i in range(len(header)):
+        if header[i] in date_titles:
+            if positions[i] is not None:
+                formats[header[i]] = date_order([row[positions[i]] for row in rows], header[i])
+            else:
+                formats[header[i]] = date_order([], header[i])
+    return formats
+
+
+# Re-orders and formats numbered rows, setting aside the ones with a value that can't be formatted.
+def order_rows(numbered, positions, header, parsers, aside=set_aside):
+    for line, row in numbered:
+        try:
+            ordered = order_row(row, positions, header, parsers)
+        except Exception:
+            aside(line, order_fault(row, positions, header, parsers), row)
+            continue
+        yield line, ordered
+
+
+# Finds the value of a row that order_row couldn't format, and says why.
+def order_fault(row, positions, header, parsers):
+    for i in range(len(header)):
+        try:
+            parse_cell(row[positions[i]] if positions[i] is not None else "", header[i], parsers)
+        except Exception as error:
+            return format_fault(header[i], error)
+    return "a value that could not be formatted"
+
+
+def order_row(row, positions, header, parsers):
+    return [parse_cell(row[positions[i]] if positions[i] is not None else "", header[i], parsers)
+            for i in range(len(header))]
+
+
+# Parallel counterpart of stream, for very large text files. The header is found once, then the rest of the file is
+# cut into byte ranges on line boundaries, which the workers normalize on their own. The rows come back in their
+# original order and are written out by stream_convert like any other. Excel and smaller files are just streamed, and
+# so are files with quoted fields, since one of those could run over the line a range is cut at.
+def split_stream(name, save, header, case, pathway, workers, output=None, size=16 * 1024 * 1024):
+    dialect = sniff(name, case)
+    if dialect is None or dialect[1] != csv.QUOTE_NONE or os.path.getsize(name) <= size:
+        return stream(name, save, header, case, pathway, output)
+
+    encoding = locale.getpreferredencoding(False)
+    with open(name, 'rb') as f:
+        for header_line in range(dialect[2] + 1):
+            line = f.readline()
+        heading = rewrite_header(tidy_row(next(csv.reader(decode(line, encoding), delimiter=dialect[0],
+                                                          quoting=dialect[1]))), case, dialect[2])
+        positions = check_heading(heading, header)
+
+        # Each range ends at the start of a line, the first one after the planned cut.
+        body = start = f.tell()
+        end = os.path.getsize(name)
+        ranges = []
+        while start < end:
+            f.seek(min(start + size, end))
+            f.readline()
+            ranges.append((start, f.tell()))
+            start = f.tell()
+
+        f.seek(body)
+        records = csv.reader(decode(f, encoding), delimiter=dialect[0], quoting=dialect[1])
+        # Faulty rows are only left out of the sample, since the workers set them aside.
+        sample = stream_cells(((records.line_num, cells) for cells in records), len(heading), tidy_row, None, False)
+        formats = date_orders([row for line, row in itertools.islice(sample, 100)], positions, header)
+
+    def rows():
+        line = dialect[2] + 2
+        with futures.ProcessPoolExecutor(workers) as executor:
+            # Only a couple of chunks per worker are kept in flight, so memory doesn't grow with the file.
+            pending = collections.deque()
+            for chunk in ranges:
+                pending.append(executor.submit(parse_chunk, name, encoding, dialect, chunk, heading, header, formats))
+                if len(pending) >= 2 * workers:
+                    line = yield from chunk_rows(pending.popleft().result(), line)
+            while pending:
+                line = yield from chunk_rows(pending.popleft().result(), line)
+
+    stream_convert(rows(), save, pathway, header, output)
+
+
+# Hands over the rows of a chunk, once the rows it set aside are set aside for good. The workers number the lines of
+# their own chunk, so the line the chunk starts on is added on. Returns the line the next chunk starts on.
+def chunk_rows(result, line):
+    rows, rejects, lines = result
+    for relative, reason, cells in rejects:
+        set_aside(line + relative - 1, reason, cells)
+    yield from rows
+    return line + lines
+
+
+# Normalizes one byte range of a file, for split_stream. Returns its rows, the rows it set aside, numbered from the
+# first line of the range, and how many lines the range has.
+def parse_chunk(name, encoding, dialect, chunk, heading, header, formats):
+    with open(name, 'rb') as f:
+        f.seek(chunk[0])
+        data = f.read(chunk[1] - chunk[0])
+    positions = check_heading(heading, header)
+    parsers = {}
+    for title in formats:
+        parsers[title] = date_parser(formats[title], 3)
+    records = csv.reader(decode(data, encoding), delimiter=dialect[0], quoting=dialect[1])
+    rejects = []
+    aside = lambda *reject: rejects.append(reject)
+    numbered = stream_cells(((records.line_num, cells) for cells in records), len(heading), tidy_row, aside, False)
+    rows = order_rows(numbered, positions, header, parsers, aside)
+    return [row for line, row in rows], rejects, data.count(b'\n')
+
+
+# Reads raw bytes as text the same way open() would, newlines included.
+def decode(data, encoding):
+    if isinstance(data, bytes):
+        data = io.BytesIO(data)
+    return io.TextIOWrapper(data, encoding=encoding, errors='surrogateescape')
+
+
+# Streaming counterpart of convert. Writes each row as it comes in.
+def stream_convert(rows, save, pathway, header, output=None):
+    with open_sink(save, pathway, header, output) as writer:
+        writer.writerows(rows)
+        check_kept(writer.kept, quarantine)
+
+    print("Excelled")
+
+
+# Mainly hit and miss. I wish I could make this a bit smarter, but for now, its just going to try each date format
+# If it works, it works. If there's an error, it tries the next date format. I don't like this because there is the
+# slim possibility that a date will be able to work for MM/DD/YYYY and YYYY/MM/DD. date_order takes care of that for
+# whole columns, by handing over the formats with the column's own one first.
+def timemachine(date, date_mode, formats=None):
+    if formats is None:
+        formats = date_formats
+    # For properly formatted dates. Excel hands them over as numbers, so this must be tried before the arguments are
+    # converted to strings. Text files have no date mode, so there is nothing to try for them.
+    if date_mode in (0, 1) and isinstance(date, (int, float)):
+        serial = serial_date(date, date_mode)
+        if serial is not None:
+            return serial
+    dates = flatten_date(date)
+    for i in range(len(formats)):
+        try:
+            timeholder = time.strptime(dates, formats[i])
+            if i and profile is not None:
+                count('date fallbacks')
+            return time.strftime("%m/%d/%Y", timeholder)
+        except (ValueError, TypeError):
+            pass
+    # Dates that are already written the way they are written out, blanks, and the zeros that stand for no date, are
+    # let through as they are, and written as NULL if need be. Anything else can't be written as a date, so the row it
+    # is in is set aside.
+    if not str(date).strip() or date == 0 or date in ('0', 'NULL'):
+        return date
+    try:
+        time.strptime(dates, "%m/%d/%Y")
+        return date
+    except (ValueError, TypeError):
+        pass
+    if profile is not None:
+        count('unparsed dates')
+    raise ValueError("%r fits none of the date formats" % (date,))
+
+
+# The formats timemachine tries, in the order it tries them: DDMonthYY, MonthDDYY, YYYYMMDD, MMDDYYYY and YYYY/MM/DD.
+date_formats = ["%d%b%y", "%b%d%y", "%Y%m%d", "%m%d%Y", "%Y/%m/%d"]
+
+
+# The day Excel counts its serial numbers from, for each date mode: the end of 1899, or 1904 for workbooks from old
+# Macs. And the serial numbers that can be dates in each, from the first to one past the last. In the 1900 date mode,
+# the ones before March 1900 are left out, since Excel counts a 29th of February 1900 that never was.
+excel_epochs = {0: datetime.date(1899, 12, 30), 1: datetime.date(1904, 1, 1)}
+excel_days = {0: (61, 2958466), 1: (1, 2957004)}
+
+
+# Turns an Excel serial number into a date, the same one xlrd.xldate_as_tuple would, with the time of day rounded to
+# the second. Returns None for numbers that can't be dates, where xlrd would raise.
+def serial_date(value, date_mode):
+    first, last = excel_days[date_mode]
+    if not 0 <= value < last:
+        return None
+    days = int(value)
+    if round((value - days) * 86400) == 86400:
+        days += 1
+    if not first <= days < last:
+        return None
+    return (excel_epochs[date_mode] + datetime.timedelta(days=days)).strftime("%m/%d/%Y")
+
+
+# Normalizes a date so that the formatting is more consistent with the formats above.
+def flatten_date(date):
+    try:
+        # Converts dates from floats to strings. They won't ever be needed as floats again.
+        dates = str(int(date))
+    except ValueError:
+        dates = date
+    try:
+        dates = dates.replace('-', '')
+    except AttributeError:
+        pass
+    return dates
+
+
+# Works out the order to try the date formats in for a column. The sample is checked against every format, and the
+# one that fits the most of it goes first, with the others kept as a fallback for the odd value that doesn't fit. If
+# YYYYMMDD and MMDDYYYY fit the sample equally well there is no telling them apart, so that gets reported and the
+# usual order is kept.
+def date_order(column, title, size=100):
+    sample = []
+    for value in column:
+        if len(sample) == size:
+            break
+        if not str(value).isspace() and value != '':
+            sample.append(flatten_date(value))
+
+    counts = [0] * len(date_formats)
+    for dates in sample:
+        for i in range(len(date_formats)):
+            try:
+                time.strptime(dates, date_formats[i])
+                counts[i] += 1
+            except (ValueError, TypeError):
+                pass
+
+    if max(counts) == 0:
+        return date_formats
+    best = counts.index(max(counts))
+    if counts[date_formats.index("%Y%m%d")] == counts[date_formats.index("%m%d%Y")] == counts[best]:
+        print("Ambiguous dates under %s: %d of %d sampled fit both YYYYMMDD and MMDDYYYY. Reading them as YYYYMMDD."
+              % (title, counts[best], len(sample)))
+    return [date_formats[best]] + [form for form in date_formats if form != date_formats[best]]
+
+
+# Makes the parser for a column of dates, which tries the formats in the order given. Ledgers repeat the same few
+# hundred dates over and over, so each value is only parsed once.
+def date_parser(formats, date_mode):
+    @functools.lru_cache(maxsize=65536)
+    def parse(date):
+        return timemachine(date, date_mode, formats)
+    return parse
+
+
+class Normalizer:
+    # header is the header to convert into, the converters' own by default. aliases maps each of its columns to the
+    # headers it goes by in the source files, like header_table does. Without it, the converters' hash maps are used,
+    # and picked by the name of each file like they pick them. rows, size, compress and level split and compress what
+    # write_file writes, like --part-rows, --part-size, --compress and --level do.
+    def __init__(self, header=None, aliases=None, delimiter='\t', headed=False, slack=0, rows=125000, size=None,
+                 compress=None, level=None):
+        self.header = list(target_header if header is None else header)
+        self.aliases = aliases
+        self.output = {'delimiter': delimiter, 'headed': headed, 'slack': slack, 'rows': rows, 'size': size,
+                       'compress': compress, 'level': level}
+
+        # An alias table of its own gets a case of its own, named after it, so that it is only compiled once however
+        # many Normalizers are set up with it.
+        self.case = None
+        if aliases is not None:
+            table = sorted((key, list(aliases[key])) for key in aliases)
+            self.case = "aliases %s" % hashlib.sha1(repr(table).encode()).hexdigest()[:8]
+            if self.case not in header_matchers:
+                header_matchers[self.case] = compile_headers(self.case, header_hash=aliases)
+
+    # Converts the rows of a file, which can be anything the converters read. Returns a generator over them.
+    def normalize_file(self, path):
+        heading, numbered, date_mode = stream_source(path, self.file_case(path))
+        return self.parse(heading, numbered, date_mode)
+
+    # Converts rows that have already been read in, as lines of text or lists of cells, with the header somewhere in
+    # the first few. Dates that are Excel serial numbers need the date mode of the workbook they came from. Returns a
+    # generator over them.
+    def normalize_rows(self, rows, date_mode=3):
+        # Lists of cells are copied, since they are tidied up in place.
+        rows = (row if isinstance(row, str) else list(row) for row in rows)
+        heading, numbered = stream_colify(rows, self.case)
+        return self.parse(heading, numbered, date_mode)
+
+    # Converts a file and writes it into a folder, in parts, the way the converters do. save is what the parts are
+    # named after, the name of the file by default. Returns the names of the parts.
+    def write_file(self, path, folder, save=None):
+        if save is None:
+            save = os.path.splitext(os.path.basename(path))[0]
+        rows = self.normalize_file(path)
+        output = dict(self.output, parts=[])
+        with open_sink(save, folder, self.header, output) as writer:
+            writer.writerows(rows)
+        return [name for name, suffix in output['parts']]
+
+    def file_case(self, path):
+        if self.aliases is not None:
+            return self.case
+        return file_case(os.path.splitext(os.path.basename(path))[0])
+
+    # The header is checked straight away, so that a file that can't be converted fails here and not on its first row.
+    def parse(self, heading, numbered, date_mode):
+        rows = stream_parse(heading, numbered, self.header, date_mode)
+        return (row for line, row in rows)
@@ -1,6 +1,14 @@
 from cx_Freeze import setup, Executable
 
-build_exe_options = {"packages": ["os", "datetime", "fuzzywuzzy", "xlrd", "time", "csv", "shutil", "Levenshtein"]}
+# The converter runs on Normalizer, which has to be next to it. Normalizer imports xlrd, fuzzywuzzy and sqlite3 only
+# when a run first needs them, so cx_Freeze can't see them and they have to be listed here. The libraries nothing here
+# uses are kept out of the build, and the rest is zipped, so that the exe has less to load and look through when it
+# starts.
+build_exe_options = {"packages": ["fuzzywuzzy", "Levenshtein", "xlrd"],
+                     "includes": ["sqlite3"],
+                     "excludes": ["numpy", "tkinter", "unittest", "pydoc_data", "lib2to3", "distutils", "test"],
+                     "zip_include_packages": ["*"],
+                     "zip_exclude_packages": []}
 
 setup(	name='Pipe Converter',
     	version = '4.2',
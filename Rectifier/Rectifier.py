@@ -22,10 +22,31 @@ Built in Windows 7
 
 import os
 import datetime
-from fuzzywuzzy import fuzz
 import time
 import csv
 import shutil
+import functools
+import re
+import importlib
+
+
+# Stands in for a module that is only imported the first time something on it is used, the way the converters do it,
+# so that starting up doesn't pay for fuzzywuzzy until a header has to be fuzzy matched.
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        return getattr(self._import(), attribute)
+
+    def _import(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+
+fuzz = LazyModule('fuzzywuzzy.fuzz')
 
 def main():
     # Uncomment this line later
@@ -40,50 +61,75 @@ def main():
 
     cycle(source, header, name)
 
-# Cycles through every single folder in the path, converting each file to an excel file.
+# Cycles through every single folder in the path, converting each file to an excel file. The folder is only listed
+# once, and a file is only removed once it has been fixed. Finishes with a summary of what happened to each file.
 def cycle(source, header, name):
     home = os.path.expanduser('~')
     folder_path = home + "/Desktop/" + source + "/"
-    filename = seek(folder_path)
+    filenames = seek(folder_path)
     pathway = direct(name)
 
-    for x in range(0, len(seek(folder_path))):
-       try:
-            file = read_txt_file("%s%s" % (folder_path, (seek(folder_path))[x]))
-            trialOne = spacify(file)
-            if tsa_checkpoint(trialOne, header) and equalizer(trialOne):
-                excelling(trialOne, filename[x], pathway)
-            else:
-                roundThree = []
-                for index in range(len(brutalizer(file))):
-                    roundThree.append(get_row(brutalizer(file)[index]))
-                for i in range(len(roundThree[0])):
-                    roundThree[0][i] = file_recognition(roundThree[0][i])
-                final = normalize(roundThree)
-                if tsa_checkpoint(final, header) and equalizer(final):
-                    excelling(final, filename[x], pathway)
-
-            os.remove("%s%s" % (folder_path, seek(folder_path)[x]))
-       except:
-            pass
-
-def normalize(rows):
-    normal = len(rows[0])
+    summary = []
+    for filename in filenames:
+        try:
+            rows, strategy = rectify(read_txt_file("%s%s" % (folder_path, filename)), header)
+            if rows is not None:
+                excelling(rows, filename, pathway)
+                os.remove("%s%s" % (folder_path, filename))
+        except Exception as e:
+            strategy = "not fixed, %s" % e.__class__.__name__
+        summary.append((filename, strategy))
+
+    print("\nSummary")
+    for filename, strategy in summary:
+        print("%s: %s" % (filename, strategy))
+
+# Fixes a file in a single pass. Every line is spacified and split as it comes, and the file stays that way for as
+# long as the rows line up with the header. Once one doesn't, the lines before it are brutalized instead, and so is
+# the rest of the file, with the extra cells merged into the Name column. Returns the fixed rows along with the
+# strategy that fixed them, or None with the reason the file couldn't be fixed.
+def rectify(lines, header):
+    if not lines:
+        return None, "not fixed, the file is empty"
+    heading = get_row(spaced(lines[0]))
+    if heading is None:
+        return None, "not fixed, no header"
+    heading = headify([heading])[0]
+    if not tsa_checkpoint([heading], header):
+        return None, "not fixed, too many columns"
     index = None
-    for i in range(0, normal):
-        if rows[0][i] == "Name":
-            index = i
-
-    holder = list()
-    holder.append(rows[0])
-
-    for irow in range(1, len(rows)):
-        temp = rows[irow]
-        while len(temp) > normal:
-            temp = merge(temp, index)
-        holder.append(temp)
-
-    return holder
+    if "Name" in heading:
+        index = heading.index("Name")
+
+    rows = [heading]
+    strategy = "spacified"
+    for irow in range(1, len(lines)):
+        if strategy == "spacified":
+            row = get_row(spaced(lines[irow]))
+            if row is None or len(row) == len(heading):
+                if row is not None:
+                    rows.append(row)
+                continue
+            strategy = "brutalized"
+            rows = [heading]
+            for earlier in range(1, irow):
+                row = get_row(brutal(lines[earlier]))
+                if row is not None:
+                    rows.append(row)
+        row = get_row(brutal(lines[irow]))
+        if row is not None:
+            rows.append(row)
+
+    if strategy == "brutalized":
+        for irow in range(1, len(rows)):
+            if len(rows[irow]) > len(heading):
+                if index is None:
+                    return None, "not fixed, no Name column to merge into"
+                while len(rows[irow]) > len(heading):
+                    rows[irow] = merge(rows[irow], index)
+        if not equalizer(rows):
+            return None, "not fixed, rows too short"
+    return rows, strategy
 
 def merge(arr, index):
     temp = []
@@ -95,11 +141,9 @@ def merge(arr, index):
         temp.append(arr[j])
     return temp
 
-def brutalizer(rows):
-    temp = rows
-    for irow in range(1, len(rows)):
-        temp[irow] = '\t'.join(rows[irow].split())
-    return temp
+# Replaces every run of whitespace in a line with a single tab.
+def brutal(line):
+    return '\t'.join(line.split())
 
 def headify(rows):
     temp = rows
@@ -114,16 +158,9 @@ def equalizer(rows):
             return False
     return True
 
-def spacify(rows):
-    temp = rows
-    counter = 2
-    for row in range(len(rows)):
-        while rows[row].find(" " * counter) != -1:
-            counter += 1
-        while counter > 1:
-            temp[row] = rows[row].replace(" " * counter, "\t")
-            counter -= 1
-    return temp
+# Replaces every run of two or more spaces in a line with a single tab.
+def spaced(line):
+    return re.sub(" {2,}", "\t", line)
 
 def tsa_checkpoint(rows, header):
     if len(rows[0]) > len(header):
@@ -137,6 +174,27 @@ def tsa_checkpoint(rows, header):
 # Mode determines if the file_recognition function will output a boolean showing success or failure, or if it will
 # output a new header.
 def file_recognition(unit, mode="rewrite"):
+    global header_matcher
+    if header_matcher is None:
+        header_matcher = compile_headers()
+
+    key = header_matcher(unit.lower())
+    if key is not None:
+        return key
+    # program would never run out here if the unit was located in the hash map.
+
+    if mode == "rewrite":
+        return unit
+    else:
+        return False
+
+# The compiled header matcher. Built the first time a header is looked up.
+header_matcher = None
+
+# Builds the header matcher. Every alias is resolved ahead of time, so a header spelled exactly like one of them is just
+# a dictionary lookup, and anything else is only fuzzy matched against aliases of a close enough length to reach the
+# benchmark. Answers are memoized, since the same headers come up in every file.
+def compile_headers(benchmark=90):
     header_hash = {'Name': ['Vendor Name', 'Name1', 'Name', 'Vname', 'Vendor_name'],
                    'Vendor_Id': ['Vendor_Id', 'Vendor ID', 'Vendor Number', 'Vendor', 'Duns_no', 'Vendor_number',
                                  'Vendor #', 'Vend_no'],
@@ -157,23 +215,38 @@ def file_recognition(unit, mode="rewrite"):
                    'Entered_Date': ['Date_added', 'Post Date', 'Entered Date', 'Posting_Date', 'Posting Date',
                                     'Create Date', 'ReconDate', 'entry_date', 'Create Dt', 'Payment Entry Date']}
 
-    # If unit has a match within the table, this automatically cuts out of the for loop and returns the key.
-    # Else, it sets the errorCounter value to 1.
+    aliases = []
     for key in header_hash:
-        counter = 0
-        errorCounter = 0
-        while not fuzzy(unit, header_hash[key][counter]) and counter < len(header_hash[key]) - 1:
-            counter += 1
-        if fuzzy(unit, header_hash[key][counter]):
-            return key
-        else:
-            errorCounter += 1
-    # program would never run out here if the unit was located in the hash map.
+        for alias in header_hash[key]:
+            aliases.append((len(aliases), alias.lower(), key))
+
+    lengths = {}
+    for entry in aliases:
+        lengths.setdefault(len(entry[1]), []).append(entry)
+
+    # Candidates stay in hashmap order, so the first key with a matching alias still wins.
+    def search(text):
+        candidates = []
+        for length in lengths:
+            if 200 * min(len(text), length) >= (benchmark - 0.5) * (len(text) + length):
+                candidates.extend(lengths[length])
+        candidates.sort()
+        for position, alias, key in candidates:
+            if fuzzy(text, alias, benchmark):
+                return key
+        return None
 
-    if mode == "rewrite":
-        return unit
-    else:
-        return False
+    exact = {}
+    for position, alias, key in aliases:
+        if alias not in exact:
+            exact[alias] = search(alias)
+
+    @functools.lru_cache(maxsize=4096)
+    def match(text):
+        if text in exact:
+            return exact[text]
+        return search(text)
+    return match
 
 def fuzzy(input, thata, benchmark=90):
     input = input.lower()